@@ -8,6 +8,7 @@ Description          : Create a CSV file with values of daily precipitation
                        - CSV Fields:  ID station | date | total_mm(APD)
                        - APD (Accumulation Precipitation of Day):
                             Previuos day(12:00 to 23:59) + Current day(00:00 to 11:59)
+                       - Zones(polygons): ID zone | date | mean_mm | max_mm
                        Save CSV in directory where this called
 Date                 : March, 2020
 copyright            : (C) 2020 by Luiz Motta
@@ -39,26 +40,24 @@ __date__ = '2020-03-16'
 __copyright__ = '(C) 2020, Luiz Motta'
 __revision__ = '$Format:%H$'
  
-import sys, os, csv
+import sys, os, csv, shutil, time
+import threading, queue
+from multiprocessing import Pool
 from datetime import datetime, timedelta
-import urllib.request, urllib.error
 from multiprocessing.pool import ThreadPool
 
-from osgeo import gdal
+import numpy as np
+
+from osgeo import gdal, ogr, osr
 from osgeo.gdalconst import GA_ReadOnly
 gdal.UseExceptions()
 
-from mod_py.valuepixel import ValuePixel
-
 import argparse
-from mod_py.argparse_types import DateType, EmailType, FilePathType
-
-def addBasicAuthenticationRequest(host, user, password):
-    passman = urllib.request.HTTPPasswordMgrWithDefaultRealm()
-    passman.add_password(None, host, user, password )
-    authhandler = urllib.request.HTTPBasicAuthHandler( passman )
-    opener = urllib.request.build_opener( authhandler)
-    urllib.request.install_opener(opener)
+from mod_py.argparse_types import DateType, EmailType
+from mod_py.httpclient import HttpClient
+from mod_py.tilecache import TileCache
+from mod_py.dailymatrix import DailyMatrix
+from mod_py.jobmetrics import JobMetrics
 
 
 class GpmDataset():
@@ -73,19 +72,35 @@ class GpmDataset():
         'deltaSecond': timedelta(seconds=1)
     }
     IMAGES_DAY = 48 # Day(24h) = 48 * 1/2 hour
+    # Ranges of images(products) of server:
+    # - step: Interval of image, aligned with start of day(00:00)
+    # - scale: Value to unit of 30min(0.1 mm/hr), accumulations are 0.1 mm(2 * 1/2 hour by hour)
+    RANGES = {
+        '30min': { 'step': timedelta(minutes=30), 'scale': 1 },
+        '3hr': { 'step': timedelta(hours=3), 'scale': 2 },
+        '1day': { 'step': timedelta(days=1), 'scale': 2 }
+    }
+    TABLE_SQLITE = 'stations_cerrado_gpm' # See inmet_estacoes_sql/stations_gpm.sql
+    TABLE_SQLITE_ZONES = 'zones_cerrado_gpm' # Mean of zones, not mixed with stations
+    COLUMNS_SQLITE_ZONES = ( 'zone', 'date', 'mean_mm' )
     VSICURL = False
+    VSIMEM = '/vsimem/gpm'
+    ARCHIVE_BBOX = ( -74.0, -34.0, -34.0, 6.0 ) # Brazil
+    ARCHIVE_OPTIONS = [ 'TILED=YES', 'COMPRESS=DEFLATE', 'PREDICTOR=2', 'ZLEVEL=9' ]
 
     @staticmethod
-    def formatImageName():
+    def formatImageName(rangeImage=RANGE):
         """
         Example image: 3B-HHR-L.MS.MRG.3IMERG.20061222-S100000-E102959.0600.V06B.30min.tif
+        Accumulations(3hr, 1day) are named by last 1/2 hour:
+            3B-HHR-L.MS.MRG.3IMERG.20061222-S233000-E235959.1410.V06B.1day.tif
         - Type: 3B-HHR-L.MS.MRG.3IMERG
         - Day: 20061222 (YYYYmmDD)
         - Start: S100000 (HHMMSS)
         - End:   E102959 (HHMMSS)
         - Total minutes of day: 0600 (DDDD)
         - Version: V06B (version = 6)
-        - Range: 30min
+        - Range: 30min(see RANGES)
 
         Usage:
             f_name = formatImageName()
@@ -105,64 +120,136 @@ class GpmDataset():
             'end': 'E{e_hour:02}{e_minute:02}{e_second:02}',
             'totalmin': '{totalmin:04}',
             'version': f"V{GpmDataset.VERSION:02}B",
-            'range': GpmDataset.RANGE
+            'range': rangeImage
         }
         return "{type}.{day}-{start}-{end}.{totalmin}.{version}.{range}".format( **f_image )
 
     @staticmethod
-    def getValuesDatatime(v_datetime):
+    def getValuesDatatime(v_datetime, rangeImage=RANGE, iniHourBefore=CONFIG_TIME['iniHourBefore']):
         """
         Args:
             v_datetime: datetime
+            rangeImage: see RANGES
+            iniHourBefore: Hour of start in previous day(24 for current day, 00:00 to 23:59)
         Return: Generator of dictionary of valueDatetime(see formatImageName )
                 Previuos day(12:00 to 23:59) and Current day(00:00 to 11:59)
         """
         previosDay = v_datetime - timedelta(days=1)
-        args = ( previosDay.year, previosDay.month, previosDay.day, GpmDataset.CONFIG_TIME['iniHourBefore'] )
-        s_dt = datetime( *args )
-        for _i in range( GpmDataset.IMAGES_DAY ):
-            e_dt = s_dt + GpmDataset.CONFIG_TIME['deltaStep'] - GpmDataset.CONFIG_TIME['deltaSecond']
+        args = ( previosDay.year, previosDay.month, previosDay.day )
+        s_dt = datetime( *args ) + timedelta( hours=iniHourBefore )
+        step = GpmDataset.RANGES[ rangeImage ]['step']
+        deltaStep = GpmDataset.CONFIG_TIME['deltaStep']
+        for _i in range( timedelta(days=1) // step ):
+            n_dt = s_dt + step - deltaStep # Last 1/2 hour(name of image)
+            e_dt = n_dt + deltaStep - GpmDataset.CONFIG_TIME['deltaSecond']
             v = {
-                'year': s_dt.year,
-                'month': s_dt.month,
-                'day': s_dt.day,
-                's_hour': s_dt.hour,
-                's_minute': s_dt.minute,
-                's_second': s_dt.second,
+                'year': n_dt.year,
+                'month': n_dt.month,
+                'day': n_dt.day,
+                's_hour': n_dt.hour,
+                's_minute': n_dt.minute,
+                's_second': n_dt.second,
                 'e_hour': e_dt.hour,
                 'e_minute': e_dt.minute,
                 'e_second': e_dt.second,
-                'totalmin': s_dt.hour * 60 + s_dt.minute
+                'totalmin': n_dt.hour * 60 + n_dt.minute
             }
-            s_dt += GpmDataset.CONFIG_TIME['deltaStep']
+            s_dt += step
             yield v
 
-    def __init__(self, email):
-        addBasicAuthenticationRequest( f"https://{self.HOST}", email, email )
+    @staticmethod
+    def getRange(iniHourBefore):
+        """
+        Return: Range with less images for the day starting in iniHourBefore(see getValuesDatatime)
+        """
+        items = sorted( GpmDataset.RANGES.items(), key=lambda item: item[1]['step'], reverse=True )
+        for rangeImage, _v in items:
+            if GpmDataset.checkRange( rangeImage, iniHourBefore )['isOk']:
+                return rangeImage
+        return GpmDataset.RANGE
+
+    @staticmethod
+    def checkRange(rangeImage, iniHourBefore):
+        """
+        Images of range are aligned with start of day(00:00), the start of day(iniHourBefore) must be aligned with step
+        Return: { 'isOk', 'message' }
+        """
+        start = timedelta( hours=iniHourBefore % 24 )
+        if start % GpmDataset.RANGES[ rangeImage ]['step'] == timedelta(0):
+            return { 'isOk': True }
+        ranges = [ k for k, v in GpmDataset.RANGES.items() if start % v['step'] == timedelta(0) ] + [ 'auto' ]
+        msg = f"Range '{rangeImage}' is not aligned with ini_hour({iniHourBefore}), images start at 00:00(use range: {', '.join( ranges )})"
+        return { 'isOk': False, 'message': msg }
+
+    @staticmethod
+    def isValidImage(filepath):
+        """
+        Integrity of image: open and read the last line(truncated file fails)
+        """
+        ds = gdal.Open( filepath, GA_ReadOnly )
+        band = ds.GetRasterBand(1)
+        band.ReadRaster( 0, ds.RasterYSize - 1, ds.RasterXSize, 1 )
+        ds = None
+        return True
+
+    def __init__(self, email, timeout=30, retries=3, url_root=None, dir_cache=None, cache_bytes=0, in_memory=False, rangeImage=RANGE, iniHourBefore=CONFIG_TIME['iniHourBefore'], dir_archive=None, archive_bbox=ARCHIVE_BBOX):
+        """
+        Args:
+            url_root: Root of server(default: https://HOST)
+            rangeImage: Range of images(see RANGES) or 'auto'(see getRange)
+            iniHourBefore: see getValuesDatatime
+            dir_cache: Directory of cache of images(None for without cache)
+            cache_bytes: Limit of bytes of cache
+            in_memory: Images in GDAL memory(/vsimem/), used when without cache
+            dir_archive: Directory of archive of images cropped by archive_bbox(Int16, compressed),
+                         with the layout of server(YYYY/mm/<name of image>), used before cache
+        """
+        self.client = HttpClient( email, email, timeout=timeout, retries=retries )
+        self.cache = None
+        if not dir_cache is None:
+            self.cache = TileCache( dir_cache, cache_bytes, self.isValidImage )
+        if url_root is None:
+            url_root = f"https://{self.HOST}"
+        self.range = self.getRange( iniHourBefore ) if rangeImage == 'auto' else rangeImage
+        self.iniHourBefore = iniHourBefore
+        self.images_day = timedelta(days=1) // self.RANGES[ self.range ]['step']
+        self.scale = self.RANGES[ self.range ]['scale']
         f_image = {
-            'root': f"https://{self.HOST}/{self.DIR}",
+            'root': f"{url_root}/{self.DIR}",
             'dir': '{year:04}/{month:02}',
-            'name': self.formatImageName()
+            'name': self.formatImageName( self.range )
         }
         self.host_image = "{root}/{dir}/{name}.tif".format( **f_image )
-        self.getDS = self._getDS_Vsicurl if self.VSICURL else self._getDS_Download
+        self.dir_archive, self.archive_bbox = dir_archive, archive_bbox
+        if not dir_archive is None:
+            self.getDS = self._getDS_Archive
+        elif self.VSICURL:
+            self.getDS = self._getDS_Vsicurl
+        elif in_memory and self.cache is None:
+            self.getDS = self._getDS_Memory
+        else:
+            self.getDS = self._getDS_Download
         
+    def valuesDatatime(self, v_datetime):
+        """
+        Return: getValuesDatatime with range and iniHourBefore of dataset
+        """
+        return self.getValuesDatatime( v_datetime, self.range, self.iniHourBefore )
+
     def isLive(self, v_datetime):
         """
         Args:
             v_datetime: datetime
         """
-        valueDatetime = {
-            'year': v_datetime.year, 'month': v_datetime.month, 'day': v_datetime.day,
-            'e_hour': 12, 'e_minute': 29, 'e_second': 59,
-            's_hour': 12, 's_minute': 0,  's_second': 0,
-            'totalmin': 720
-        }
+        valueDatetime = next( self.valuesDatatime( v_datetime ) ) # First image of day
         url = self.host_image.format( **valueDatetime )
-        try:
-            _response = urllib.request.urlopen(url, timeout=5)
-        except urllib.error.URLError as e:
-            return { 'isOk': False, 'message': f"Host: '{self.HOST}'\nUrl: {url}\n{e.reason}" }
+        if not self.cache is None and not self.cache.get( url.split('/')[-1] ) is None:
+            return { 'isOk': True }
+        if not self.dir_archive is None and os.path.exists( self.archiveFilepath( url ) ):
+            return { 'isOk': True }
+        r = self.client.status( url )
+        if not r['isOk']:
+            return { 'isOk': False, 'message': f"Host: '{self.HOST}'\n{r['message']}" }
         
         return { 'isOk': True }
 
@@ -176,144 +263,1072 @@ class GpmDataset():
             return { 'isOk': False, 'message': msg }
         return { 'isOk': True, 'dataset': ds }
 
+    def _getDS_Memory(self, url):
+        image = url.split('/')[-1]
+        r = self.client.get( url )
+        if not r['isOk']:
+            return { 'isOk': False, 'message': r['message'], 'retries': r['retries'] }
+        source = f"{self.VSIMEM}/{image}"
+        gdal.FileFromMemBuffer( source, r['result'] )
+        try:
+            ds = gdal.Open( source, GA_ReadOnly )
+        except RuntimeError: # gdal
+            gdal.Unlink( source )
+            msg = f"Url '{url}': Error open image"
+            return { 'isOk': False, 'message': msg, 'retries': r['retries'] }
+        return { 'isOk': True, 'dataset': ds, 'bytes': len( r['result'] ), 'retries': r['retries'] }
+
+    @staticmethod
+    def removeSource(source, download_keep):
+        """
+        Remove image of source(images in memory are always removed)
+        """
+        if source.startswith( GpmDataset.VSIMEM ):
+            gdal.Unlink( source )
+        elif not download_keep:
+            os.remove( source )
+
+    def releaseSource(self, source, download_keep):
+        """
+        Remove image of source(see removeSource) and unpin the image of cache
+        """
+        if not self.cache is None:
+            image = os.path.basename( source )
+            if source == self.cache.filepath( image ):
+                self.cache.unpin( image )
+        self.removeSource( source, download_keep )
+
+    def _getDS_Cache(self, url, image):
+        """
+        Image of cache is pinned(not evicted) until releaseSource
+        """
+        self.cache.pin( image )
+        filepath = self.cache.get( image )
+        info = { 'cache': True }
+        if filepath is None:
+            filepath = self.cache.filepath( image )
+            r = self.client.download( url, filepath ) # Temporary file renamed when complete
+            if not r['isOk']:
+                self.cache.unpin( image )
+                return { 'isOk': False, 'message': r['message'], 'retries': r['retries'] }
+            self.cache.add( image )
+            info = { 'bytes': r['result'], 'retries': r['retries'] }
+        try:
+            ds = gdal.Open( filepath, GA_ReadOnly )
+        except RuntimeError: # gdal
+            self.cache.unpin( image )
+            self.cache.remove( image )
+            msg = f"Url '{url}': Error open image"
+            return { 'isOk': False, 'message': msg }
+        return { 'isOk': True, 'dataset': ds, **info }
+
+    def archiveFilepath(self, url):
+        """
+        Return: filepath in archive(YYYY/mm/<name of image>)
+        """
+        return os.path.join( self.dir_archive, *url.split('/')[-3:] )
+
+    def _getDS_Archive(self, url):
+        """
+        Image of archive or download(in memory), crop and save in archive
+        """
+        filepath = self.archiveFilepath( url )
+        if os.path.exists( filepath ):
+            try:
+                return { 'isOk': True, 'dataset': gdal.Open( filepath, GA_ReadOnly ), 'cache': True }
+            except RuntimeError: # gdal, corrupt file is downloaded again
+                os.remove( filepath )
+        r = self._getDS_Memory( url )
+        if not r['isOk']:
+            return r
+        source = r['dataset'].GetDescription()
+        os.makedirs( os.path.dirname( filepath ), exist_ok=True )
+        filepath_part = f"{filepath}.part.{os.getpid()}.{threading.get_ident()}"
+        minX, minY, maxX, maxY = self.archive_bbox
+        options = gdal.TranslateOptions(
+            format='GTiff', projWin=[ minX, maxY, maxX, minY ], outputType=gdal.GDT_Int16,
+            creationOptions=self.ARCHIVE_OPTIONS, metadataOptions=[ f"SOURCE={url.split('/')[-1]}" ]
+        )
+        try:
+            ds = gdal.Translate( filepath_part, r['dataset'], options=options )
+            ds = None
+            os.replace( filepath_part, filepath )
+            r['dataset'] = gdal.Open( filepath, GA_ReadOnly )
+        except RuntimeError: # gdal
+            msg = f"Url '{url}': Error archive image"
+            return { 'isOk': False, 'message': msg, 'retries': r['retries'] }
+        finally:
+            self.removeSource( source, False )
+            if os.path.exists( filepath_part ):
+                os.remove( filepath_part )
+        return r
+
     def _getDS_Download(self, url):
         ds = None
         image = url.split('/')[-1]
+        if not self.cache is None:
+            return self._getDS_Cache( url, image )
+        info = { 'cache': True } # Kept by previous run
         try:
             if not os.path.exists( image ):
-                _response = urllib.request.urlopen(url, timeout=5) # Check if can access
-                urllib.request.urlretrieve( url, image )
+                r = self.client.download( url, image ) # One GET, with retries
+                if not r['isOk']:
+                    return { 'isOk': False, 'message': r['message'], 'retries': r['retries'] }
+                info = { 'bytes': r['result'], 'retries': r['retries'] }
             ds = gdal.Open( image, GA_ReadOnly )
-        except urllib.error.URLError as e: # urllib
-            msg = f"Url '{url}': n{e.reason}"
-            return { 'isOk': False, 'message': msg }
         except RuntimeError: # gdal
             os.remove( image )
             msg = f"Url '{url}': Error open image"
             return { 'isOk': False, 'message': msg }
-        return { 'isOk': True, 'dataset': ds }
+        return { 'isOk': True, 'dataset': ds, **info }
 
     def __call__(self, valueDatetime):
+        """
+        Return: { 'isOk', 'dataset' or 'message', 'image', 'seconds', 'bytes'(downloaded), 'retries', 'cache'(hit) }
+        """
         url = self.host_image.format( **valueDatetime )
-        return self.getDS( url )
+        t = time.perf_counter()
+        r = { 'bytes': 0, 'retries': 0, 'cache': False, **self.getDS( url ) }
+        r['seconds'] = time.perf_counter() - t
+        r['image'] = url.split('/')[-1]
+        return r
 
 
-def saveCsvDailyGpm(dateIni, dateEnd, pathfileCoordCsv, getDataSetGpm, download_keep, printStatus):
-    def getStationsCsv(filepath):
-        item = lambda row: {
-            'id': row[0],
-            'lat': float( row[1] ), 'long': float( row[2] )
-        }
-        with open( filepath) as csvfile:
-            rows = csv.reader( csvfile, delimiter=SEP_CSV )
+def getWindow(transf, xsize, ysize, bbox=None):
+    """
+    Args:
+        bbox: ( minX, minY, maxX, maxY ) or None for all image
+    Return: ( xoff, yoff, cols, rows ) of pixels of image covering bbox
+    """
+    if bbox is None:
+        return 0, 0, xsize, ysize
+    minX, minY, maxX, maxY = bbox
+    t = gdal.InvGeoTransform( transf )
+    px = sorted( [ t[0] + t[1] * minX + t[2] * maxY, t[0] + t[1] * maxX + t[2] * minY ] )
+    py = sorted( [ t[3] + t[4] * minX + t[5] * maxY, t[3] + t[4] * maxX + t[5] * minY ] )
+    xoff, yoff = max( int( np.floor( px[0] ) ), 0 ), max( int( np.floor( py[0] ) ), 0 )
+    cols = min( int( np.ceil( px[1] ) ), xsize ) - xoff
+    rows = min( int( np.ceil( py[1] ) ), ysize ) - yoff
+    return xoff, yoff, cols, rows
+
+
+class StationsPixels():
+    """
+    Index of pixels of stations, calculated by geotransform of first image and
+    recalculated only if the geotransform(or size) of image change.
+    The values are read by one window(bounding box of stations)
+    """
+    @staticmethod
+    def fromCsv(filepath, sep=';'):
+        """
+        Args:
+            filepath: CSV with id, lat and long(with head)
+        """
+        with open( filepath ) as csvfile:
+            rows = csv.reader( csvfile, delimiter=sep )
             next( rows )
-            stations = [ item( row ) for row in rows ]
-        return stations
+            stations = [ ( row[0], float( row[1] ), float( row[2] ) ) for row in rows ]
+        return StationsPixels( [ s[2] for s in stations ], [ s[1] for s in stations ], [ s[0] for s in stations ] )
+
+    def __init__(self, xs, ys, ids=None):
+        """
+        Args:
+            xs, ys: coordinates of stations
+            ids: identifiers of stations
+        """
+        self.ids = ids
+        self.xs = np.asarray( xs, dtype=np.float64 )
+        self.ys = np.asarray( ys, dtype=np.float64 )
+        self.index = None # { 'key', 'window', 'isInside', 'rows', 'cols' }
+        self.columns = [ 'total_mm' ]
+
+    def getBbox(self, wkt=None):
+        """
+        Args:
+            wkt: SRS of image(the coordinates of stations are in SRS of images)
+        Return: bounding box of stations
+        """
+        return ( self.xs.min(), self.ys.min(), self.xs.max(), self.ys.max() )
+
+    def setIndex(self, ds):
+        transf = ds.GetGeoTransform()
+        t = gdal.InvGeoTransform( transf )
+        px = np.floor( t[0] + t[1] * self.xs + t[2] * self.ys ).astype( np.int64 )
+        py = np.floor( t[3] + t[4] * self.xs + t[5] * self.ys ).astype( np.int64 )
+        xsize, ysize = ds.RasterXSize, ds.RasterYSize
+        isInside = ( px >= 0 ) & ( px < xsize ) & ( py >= 0 ) & ( py < ysize )
+        window = None # Without stations inside
+        if isInside.any():
+            xoff, yoff = px[ isInside ].min(), py[ isInside ].min()
+            cols, rows = px[ isInside ].max() - xoff + 1, py[ isInside ].max() - yoff + 1
+            window = ( int( xoff ), int( yoff ), int( cols ), int( rows ) )
+        self.index = { # Replace(not update), safe for threads
+            'key': ( transf, xsize, ysize ),
+            'window': window,
+            'isInside': isInside,
+            'rows': py[ isInside ] - ( 0 if window is None else window[1] ),
+            'cols': px[ isInside ] - ( 0 if window is None else window[0] )
+        }
+
+    def window(self, ds):
+        """
+        Return: window( xoff, yoff, cols, rows ) of stations or None
+        """
+        key = ( ds.GetGeoTransform(), ds.RasterXSize, ds.RasterYSize )
+        if self.index is None or not self.index['key'] == key:
+            self.setIndex( ds )
+        return self.index['window']
 
-    def createWriteFile(filepath, head=None):
-        csvfile = open( filepath, mode='w')
+    def sample(self, arry, xoff=0, yoff=0):
+        """
+        Args:
+            arry: values of window(see window) or of window that contains it
+            xoff, yoff: offset of arry in image
+        Return: array(float64, sum of images without overflow) with values of stations(0 for outside of image)
+        """
+        index = self.index
+        if index['window'] is None:
+            return np.zeros( self.xs.shape )
+        values = np.zeros( self.xs.shape )
+        dx, dy = index['window'][0] - xoff, index['window'][1] - yoff
+        values[ index['isInside'] ] = arry[ index['rows'] + dy, index['cols'] + dx ]
+        return values
+
+    def __call__(self, ds, n_band=1):
+        """
+        Return: array with values of stations(0 for outside of image)
+        """
+        window = self.window( ds )
+        if window is None:
+            return self.sample( None )
+        return self.sample( ds.GetRasterBand( n_band ).ReadAsArray( *window ), *window[:2] )
+
+    def reduce(self, totals):
+        """
+        Args:
+            totals: sum of values of images of day(see __call__)
+        Return: array (stations, columns)
+        """
+        return totals[:, np.newaxis ]
+
+
+class ZonesPixels():
+    """
+    Zones(polygons) rasterized once in grid of images, recalculated only if the geotransform(or size)
+    of image change. The weight of pixel in zone is the fraction covered(supersample of pixel).
+    For each image, only the values of pixels of zones are read(one window), and the sum of day
+    by pixel is reduced by zone(mean weighted and max) with bincount.
+    The images of day must have the same grid.
+    Overlapping polygons are not supported: the overlap(subpixels) is of the last zone(order of features).
+    """
+    FIELD_ZONE = 'zone_idx'
+    def __init__(self, filepath, field=None, supersample=10):
+        """
+        Args:
+            filepath: vector of polygons(same SRS of images, or with SRS for reproject to SRS of images)
+            field: field of identifier of zone(None for FID)
+            supersample: pixels of zone by side of pixel of image
+        """
+        self.supersample = supersample
+        src = ogr.Open( filepath )
+        layer = src.GetLayer()
+        self.ds_zones = ogr.GetDriverByName('Memory').CreateDataSource('zones')
+        self.layer = self.ds_zones.CreateLayer( 'zones', layer.GetSpatialRef(), ogr.wkbUnknown )
+        self.layer.CreateField( ogr.FieldDefn( self.FIELD_ZONE, ogr.OFTInteger ) )
+        defn = self.layer.GetLayerDefn()
+        self.ids = []
+        for feat in layer:
+            self.ids.append( feat.GetFID() if field is None else feat.GetField( field ) )
+            f = ogr.Feature( defn )
+            f.SetGeometry( feat.GetGeometryRef() )
+            f.SetField( self.FIELD_ZONE, len( self.ids ) ) # 1..N(0 is outside)
+            self.layer.CreateFeature( f )
+        src = None
+        minX, maxX, minY, maxY = self.layer.GetExtent()
+        self.bbox = ( minX, minY, maxX, maxY ) # SRS of layer(see getBbox)
+        self.index = None # { 'key', 'window', 'pixels', 'pairs', 'zone', 'weight', 'starts' }
+        self.columns = [ 'mean_mm', 'max_mm' ]
+
+    def getBbox(self, wkt):
+        """
+        Args:
+            wkt: SRS of image
+        Return: bounding box of zones in SRS of image
+        """
+        srsLayer = self.layer.GetSpatialRef()
+        if srsLayer is None or not wkt:
+            return self.bbox
+        srsImage = osr.SpatialReference()
+        srsImage.ImportFromWkt( wkt )
+        if srsLayer.IsSame( srsImage ):
+            return self.bbox
+        srsLayer = srsLayer.Clone()
+        for srs in ( srsLayer, srsImage ):
+            srs.SetAxisMappingStrategy( osr.OAMS_TRADITIONAL_GIS_ORDER ) # x, y
+        ct = osr.CoordinateTransformation( srsLayer, srsImage )
+        return tuple( ct.TransformBounds( *self.bbox, 21 ) ) # Densified edges
+
+    def setIndex(self, ds):
+        """
+        Pairs(pixel, zone) with weight, sorted by zone
+        The polygons are reprojected to SRS of image by RasterizeLayer
+        """
+        transf = ds.GetGeoTransform()
+        xsize, ysize = ds.RasterXSize, ds.RasterYSize
+        xoff, yoff, cols, rows = getWindow( transf, xsize, ysize, self.getBbox( ds.GetProjection() ) )
+        if cols < 1 or rows < 1: # Outside of image
+            xoff, yoff, cols, rows = 0, 0, 1, 1
+        f = self.supersample
+        x0, y0 = gdal.ApplyGeoTransform( transf, xoff, yoff )
+        mem = gdal.GetDriverByName('MEM').Create( '', cols * f, rows * f, 1, gdal.GDT_Int32 )
+        mem.SetGeoTransform( ( x0, transf[1] / f, transf[2] / f, y0, transf[4] / f, transf[5] / f ) )
+        mem.SetProjection( ds.GetProjection() )
+        gdal.RasterizeLayer( mem, [1], self.layer, options=[ f"ATTRIBUTE={self.FIELD_ZONE}" ] )
+        band = mem.GetRasterBand(1)
+        total = len( self.ids ) + 1
+        keys, counts = [], []
+        step = max( 1, 2 ** 22 // ( cols * f * f ) ) # Rows of image by block(memory)
+        for row in range( 0, rows, step ):
+            n_rows = min( step, rows - row )
+            sub = band.ReadAsArray( 0, row * f, cols * f, n_rows * f )
+            sub = sub.reshape( n_rows, f, cols, f ).transpose( 0, 2, 1, 3 ).reshape( n_rows * cols, f * f )
+            pixel = np.repeat( np.arange( row * cols, ( row + n_rows ) * cols, dtype=np.int64 ), f * f )
+            zone = sub.ravel().astype( np.int64 )
+            isZone = zone > 0
+            k, c = np.unique( pixel[ isZone ] * total + zone[ isZone ], return_counts=True )
+            keys.append( k )
+            counts.append( c )
+        mem = None
+        keys, counts = np.concatenate( keys ), np.concatenate( counts )
+        zone = keys % total - 1
+        order = np.argsort( zone, kind='stable' )
+        zone, pixel = zone[ order ], keys[ order ] // total
+        pixels, pairs = np.unique( pixel, return_inverse=True )
+        self.index = { # Replace(not update), safe for threads
+            'key': ( transf, xsize, ysize ),
+            'window': ( xoff, yoff, cols, rows ) if pixels.size else None,
+            'rows': pixels // cols, 'cols': pixels % cols, # Unique pixels(in window)
+            'pairs': pairs, # Pixel of pair
+            'zone': zone,
+            'weight': counts[ order ] / f ** 2,
+            'starts': np.flatnonzero( np.r_[ True, zone[1:] != zone[:-1] ] ) if zone.size else zone
+        }
+
+    def window(self, ds):
+        """
+        Return: window( xoff, yoff, cols, rows ) of zones or None
+        """
+        key = ( ds.GetGeoTransform(), ds.RasterXSize, ds.RasterYSize )
+        if self.index is None or not self.index['key'] == key:
+            self.setIndex( ds )
+        return self.index['window']
+
+    def sample(self, arry, xoff=0, yoff=0):
+        """
+        Args:
+            arry: values of window(see window) or of window that contains it
+            xoff, yoff: offset of arry in image
+        Return: array(float64, sum of images without overflow) with values of pixels of zones
+        """
+        index = self.index
+        if index['window'] is None:
+            return np.zeros( 0 )
+        dx, dy = index['window'][0] - xoff, index['window'][1] - yoff
+        return arry[ index['rows'] + dy, index['cols'] + dx ].astype( np.float64 )
+
+    def __call__(self, ds, n_band=1):
+        """
+        Return: array with values of pixels of zones
+        """
+        window = self.window( ds )
+        if window is None:
+            return self.sample( None )
+        return self.sample( ds.GetRasterBand( n_band ).ReadAsArray( *window ), *window[:2] )
+
+    def reduce(self, totals):
+        """
+        Args:
+            totals: sum of values of images of day(see __call__)
+        Return: array (zones, columns), NaN for zone without pixels
+        """
+        index = self.index
+        total = len( self.ids )
+        values = totals[ index['pairs'] ]
+        sumWeight = np.bincount( index['zone'], index['weight'], minlength=total )
+        sumValues = np.bincount( index['zone'], index['weight'] * values, minlength=total )
+        result = np.full( ( total, 2 ), np.nan )
+        np.divide( sumValues, sumWeight, out=result[:, 0 ], where=sumWeight > 0 )
+        if values.size:
+            result[ index['zone'][ index['starts'] ], 1 ] = np.maximum.reduceat( values, index['starts'] )
+        return result
+
+
+def addTotals(totals, values, scale):
+    """
+    Sum of values of images by set(float64, without overflow of values of images, ex.: int16)
+    Args:
+        totals: list of sums by set(None for first image)
+        values: list of values by set(see SetsPixels)
+        scale: scale of image(see GpmDataset.RANGES)
+    Return: list of sums by set
+    """
+    if totals is None:
+        totals = [ np.zeros( np.shape( v ), dtype=np.float64 ) for v in values ]
+    return [ t + np.asarray( v, dtype=np.float64 ) * scale for t, v in zip( totals, values ) ]
+
+
+class SetsPixels():
+    """
+    Samplers(StationsPixels or ZonesPixels) of several sets, the values of sets
+    are sampled from one window of image(union of windows of sets)
+    """
+    def __init__(self, samplers):
+        self.samplers = samplers
+
+    def __call__(self, ds, n_band=1):
+        """
+        Return: list with values of sets(see sample of samplers)
+        """
+        windows = [ w for w in ( s.window( ds ) for s in self.samplers ) if not w is None ]
+        if not windows:
+            return [ s.sample( None ) for s in self.samplers ]
+        xoff, yoff = min( w[0] for w in windows ), min( w[1] for w in windows )
+        cols = max( w[0] + w[2] for w in windows ) - xoff
+        rows = max( w[1] + w[3] for w in windows ) - yoff
+        arry = ds.GetRasterBand( n_band ).ReadAsArray( xoff, yoff, cols, rows )
+        return [ s.sample( arry, xoff, yoff ) for s in self.samplers ]
+
+
+class DailyGrid():
+    """
+    Sum of images of day(window of bounding box) saved as GeoTiff(float32, mm)
+    The window is calculated by geotransform of first image(see StationsPixels)
+    """
+    TIFF_OPTIONS = [ 'TILED=YES', 'COMPRESS=DEFLATE', 'PREDICTOR=3', 'ZLEVEL=6' ]
+    def __init__(self, dir_grid, bbox=None):
+        """
+        Args:
+            bbox: ( minX, minY, maxX, maxY ) or None for all image
+        """
+        self.dir_grid, self.bbox = dir_grid, bbox
+        os.makedirs( dir_grid, exist_ok=True )
+        self.window = None # { 'key', 'window', 'transform', 'wkt' }
+
+    def setWindow(self, ds):
+        transf = ds.GetGeoTransform()
+        xsize, ysize = ds.RasterXSize, ds.RasterYSize
+        xoff, yoff, cols, rows = getWindow( transf, xsize, ysize, self.bbox )
+        x0, y0 = gdal.ApplyGeoTransform( transf, xoff, yoff )
+        self.window = {
+            'key': ( transf, xsize, ysize ),
+            'window': ( xoff, yoff, cols, rows ),
+            'transform': ( x0, transf[1], transf[2], y0, transf[4], transf[5] ),
+            'wkt': ds.GetProjection()
+        }
+
+    def __call__(self, ds, n_band=1):
+        """
+        Return: array(float32) of window
+        """
+        key = ( ds.GetGeoTransform(), ds.RasterXSize, ds.RasterYSize )
+        if self.window is None or not self.window['key'] == key:
+            self.setWindow( ds )
+        arry = ds.GetRasterBand( n_band ).ReadAsArray( *self.window['window'] )
+        return arry.astype( np.float32 )
+
+    def save(self, labelDate, arry, images):
+        """
+        Args:
+            arry: sum(mm) of images
+            images: total of images
+        Return: filepath
+        """
+        filepath = os.path.join( self.dir_grid, f"gpm_daily_{labelDate}.tif" )
+        rows, cols = arry.shape
+        drv = gdal.GetDriverByName('GTiff')
+        ds = drv.Create( filepath, cols, rows, 1, gdal.GDT_Float32, options=self.TIFF_OPTIONS )
+        ds.SetGeoTransform( self.window['transform'] )
+        ds.SetProjection( self.window['wkt'] )
+        ds.SetMetadata( { 'DATE': labelDate, 'IMAGES': str( images ) } )
+        band = ds.GetRasterBand(1)
+        band.SetDescription( f"total_mm {labelDate}" )
+        band.WriteArray( arry )
+        ds = None
+        return filepath
+
+
+def getNameDailyGpm(pathfileCoordCsv, dateIni, dateEnd):
+    """
+    Return: name of output(without extension)
+    """
+    suffix = f"{dateIni.strftime('%Y-%m-%d')}_{dateEnd.strftime('%Y-%m-%d')}"
+    name = os.path.splitext( os.path.basename( pathfileCoordCsv ) )[0]
+    return f"{name}_daily_precip_{suffix}"
+
+
+def saveCsvDailyGpm(dateIni, dateEnd, pathfileCoordCsv, getDataSetGpm, download_keep, printStatus, downloads=4, queue_days=1, resume=False, retry_errors=False, matrix=False, dailyGrid=None, metrics=None, samplers=None, checkpoint_keep=False):
+    """
+    Args:
+        pathfileCoordCsv: CSV of stations(or vector of zones, see samplers) or list of them(sets),
+                          each set with own outputs and the images read once for all sets
+        getDataSetGpm: GpmDataset(valuesDatatime, images_day, range and scale)
+        matrix: Return the DailyMatrix(station x date) of values
+        dailyGrid: DailyGrid for save the sum of images by day(None for not save)
+        metrics: JobMetrics for events(tile and day) and metrics of stages(fetch, open, sample and write)
+        samplers: StationsPixels or ZonesPixels(values by zone: mean and max) of each set,
+                  None for StationsPixels from CSV
+        checkpoint_keep: Keep the checkpoint when all days are OK(removed by default)
+    Return: list of DailyMatrix of sets(None without matrix)
+    """
+    def createWriteFile(filepath, head=None, append=False):
+        """
+        Args:
+            append: Append rows if file exists(head only for new file)
+        """
+        isNew = not ( append and os.path.exists( filepath ) )
+        csvfile = open( filepath, mode='w' if isNew else 'a' )
         writer = csv.writer( csvfile, delimiter=SEP_CSV )
-        if head: writer.writerow( head )
+        if head and isNew: writer.writerow( head )
         return { 'csvfile': csvfile, 'writerows': writer.writerows }
 
-    def getTotalPrecipitation(v_datetime, labelDate):
+    def getDaysDone(filePathCheckpoint, filePathOut, headOut, ids):
         """
-        return: { 'stations_total', 'errors' }
+        Days written by previous run: checkpoint or, if missing, dates of output with all stations
+        Return: { labelDate: [ labelDate, status, total errors ] }
         """
-        def getDatasetSources():
-            f_name = GpmDataset.formatImageName()
-            c_images = 0
-            sources, errors = [], []
-            for vd in GpmDataset.getValuesDatatime( v_datetime ):
-                c_images += 1
-                name = f_name.format( **vd )
-                msg = f"{labelDate} - Fetching {name} ({c_images}/{GpmDataset.IMAGES_DAY})..."
-                printStatus( msg )
-                r = getDataSetGpm( vd )
-                sources.append( r['dataset'].GetDescription() ) if r['isOk'] else errors.append( r['message'] )
+        days = {}
+        if os.path.exists( filePathCheckpoint ):
+            with open( filePathCheckpoint ) as csvfile:
+                rows = csv.reader( csvfile, delimiter=SEP_CSV )
+                next( rows, None )
+                days = { row[0]: row for row in rows if len( row ) == len( HEAD_CHECKPOINT ) }
+        elif os.path.exists( filePathOut ):
+            totals = {}
+            with open( filePathOut ) as csvfile:
+                rows = csv.reader( csvfile, delimiter=SEP_CSV )
+                next( rows, None )
+                for row in rows:
+                    if len( row ) == len( headOut ): totals[ row[1] ] = totals.get( row[1], 0 ) + 1
+            days = { k: [ k, STATUS_OK, 0 ] for k, v in totals.items() if v == len( ids ) }
+        if retry_errors:
+            days = { k: v for k, v in days.items() if v[1] == STATUS_OK }
+        return days
+
+    def filterRowsCsv(filepath, idxDate, dates):
+        """
+        Keep only rows(and head) with date in dates
+        Return: total of rows
+        """
+        if not os.path.exists( filepath ):
+            return 0
+        total = 0
+        filepathTemp = f"{filepath}.temp"
+        with open( filepath ) as csvIn, open( filepathTemp, mode='w' ) as csvOut:
+            rows = csv.reader( csvIn, delimiter=SEP_CSV )
+            writer = csv.writer( csvOut, delimiter=SEP_CSV )
+            head = next( rows, None )
+            if head: writer.writerow( head )
+            for row in rows:
+                if len( row ) > idxDate and row[ idxDate ] in dates:
+                    writer.writerow( row )
+                    total += 1
+        os.replace( filepathTemp, filepath )
+        return total
 
-            return { 'sources': sources, 'errors': errors }
+    def sortRowsCsv(filepath, idxDate):
+        """
+        Sort rows by date(stable, keep order of stations in date), the days of resume are appended
+        """
+        if not os.path.exists( filepath ):
+            return
+        with open( filepath ) as csvIn:
+            rows = csv.reader( csvIn, delimiter=SEP_CSV )
+            head = next( rows, None )
+            rows = sorted( rows, key=lambda row: row[ idxDate ] )
+        filepathTemp = f"{filepath}.temp"
+        with open( filepathTemp, mode='w' ) as csvOut:
+            writer = csv.writer( csvOut, delimiter=SEP_CSV )
+            if head: writer.writerow( head )
+            writer.writerows( rows )
+        os.replace( filepathTemp, filepath )
+
+    def createSet(pathfile, sampler):
+        """
+        Outputs of set(CSV, errors, checkpoint and matrix), resumed from previous run
+        Return: { 'ids', 'sampler', 'filePathOut', 'filePathError', 'filePathCheckpoint', 'totalError', 'daysDone', 'dailyMatrix', 'fwOut', 'fwError', 'fwCheckpoint' }
+        """
+        ids = sampler.ids
+        headOut = [ 'id', 'date' ] + sampler.columns
+        name = getNameDailyGpm( pathfile, dateIni, dateEnd )
+        filePathOut = f"{name}.csv"
+        filePathError = f"{name}_error.csv"
+        filePathCheckpoint = f"{name}_checkpoint.csv"
+        totalError = 0
+        daysDone = {}
+        if resume:
+            daysDone = getDaysDone( filePathCheckpoint, filePathOut, headOut, ids )
+            filterRowsCsv( filePathOut, 1, daysDone )
+            totalError = filterRowsCsv( filePathError, 0, daysDone )
+        dailyMatrix = DailyMatrix( ids, dateIni, dateEnd ) if matrix else None
+        if resume and matrix and os.path.exists( filePathOut ):
+            dailyMatrix.loadCsv( filePathOut, SEP_CSV )
+        fwCheckpoint = createWriteFile( filePathCheckpoint, HEAD_CHECKPOINT )
+        fwCheckpoint['writerows']( daysDone.values() )
+        fwCheckpoint['csvfile'].flush()
+        return {
+            'ids': ids, 'sampler': sampler,
+            'filePathOut': filePathOut, 'filePathError': filePathError, 'filePathCheckpoint': filePathCheckpoint,
+            'totalError': totalError, 'daysDone': daysDone, 'dailyMatrix': dailyMatrix,
+            'fwOut': createWriteFile( filePathOut, headOut, resume ),
+            'fwError': createWriteFile( filePathError, ['date', 'message'], resume ),
+            'fwCheckpoint': fwCheckpoint
+        }
 
+    def writeSet(dataSet, labelDate, stations_total, errors):
+        if errors:
+            dataSet['totalError'] += len( errors )
+            items = ( [ labelDate, error ] for error in errors )
+            dataSet['fwError']['writerows']( items )
+            dataSet['fwError']['csvfile'].flush()
+        items = ( [ k, labelDate, *( v/FACTOR_MM_DAY for v in values ) ] for k, values in stations_total.items() )
+        dataSet['fwOut']['writerows']( items )
+        dataSet['fwOut']['csvfile'].flush()
+        if matrix: # First column(total or mean)
+            dataSet['dailyMatrix'].set( labelDate, [ stations_total[ k ][0] / FACTOR_MM_DAY for k in dataSet['ids'] ] )
+        status = STATUS_ERROR if errors else STATUS_OK
+        dataSet['daysDone'][ labelDate ] = [ labelDate, status, len( errors ) ]
+        dataSet['fwCheckpoint']['writerows']( [ dataSet['daysDone'][ labelDate ] ] )
+        dataSet['fwCheckpoint']['csvfile'].flush()
+        return status
+
+    def closeSet(dataSet):
+        for k in ( 'fwOut', 'fwError', 'fwCheckpoint' ):
+            dataSet[ k ]['csvfile'].close()
+        if resume: # Days of previous run and days appended
+            sortRowsCsv( dataSet['filePathOut'], 1 )
+            sortRowsCsv( dataSet['filePathError'], 0 )
+        daysDone = dataSet['daysDone']
+        isComplete = len( daysDone ) == totalDaysRange and all( v[1] == STATUS_OK for v in daysDone.values() )
+        if isComplete and not checkpoint_keep:
+            os.remove( dataSet['filePathCheckpoint'] )
+        msg = f"Saved '{dataSet['filePathOut']}'."
+        printStatus( msg )
+        if not dataSet['totalError']:
+            os.remove( dataSet['filePathError'] )
+        else:
+            msg = f"\nErrors read images ({dataSet['totalError']} images): '{dataSet['filePathError']}'\r"
+            print( msg )
+
+    def fetchDays():
+        """
+        Producer: download the images of days(by poolFetch) and put in queueDays
+        Item of queue: { 'v_datetime', 'sources', 'errors', 'fetch' } or { 'exception' }
+        """
+        def putQueue(item):
+            while not stopFetch.is_set():
+                try:
+                    queueDays.put( item, timeout=1 )
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        try:
+            for dt in days:
+                if stopFetch.is_set():
+                    return
+                t = time.perf_counter()
+                results = poolFetch.map( getDataSetGpm, getDataSetGpm.valuesDatatime( dt ) )
+                fetch = { 'seconds': time.perf_counter() - t, 'bytes': 0, 'retries': 0, 'cache_hits': 0 }
+                sources, errors = [], []
+                for r in results:
+                    sources.append( r['dataset'].GetDescription() ) if r['isOk'] else errors.append( r['message'] )
+                    addMetricsFetch( dt.strftime('%Y-%m-%d'), r, fetch )
+                if not putQueue( { 'v_datetime': dt, 'sources': sources, 'errors': errors, 'fetch': fetch } ):
+                    removeSources( sources )
+                    return
+        except Exception as e:
+            putQueue( { 'exception': e } )
+
+    def addMetricsFetch(labelDate, r, fetch):
+        fetch['bytes'] += r['bytes']
+        fetch['retries'] += r['retries']
+        fetch['cache_hits'] += int( r['cache'] )
+        metrics.log( 'fetch', date=labelDate, image=r['image'], isOk=r['isOk'], seconds=round( r['seconds'], 4 ),
+                     bytes=r['bytes'], retries=r['retries'], cache=r['cache'] )
+        metrics.add( 'tiles_total', status='ok' if r['isOk'] else 'error' )
+        metrics.add( 'stage_seconds_total', r['seconds'], stage='fetch' )
+        metrics.add( 'bytes_total', r['bytes'] )
+        metrics.add( 'retries_total', r['retries'] )
+        metrics.add( 'cache_hits_total', int( r['cache'] ) )
+
+    def addMetricsDay(labelDate, status, r, stages):
+        stages = { 'fetch': r['fetch']['seconds'], **stages }
+        fields = { k: r['fetch'][ k ] for k in ( 'bytes', 'retries', 'cache_hits' ) }
+        metrics.log( 'day', date=labelDate, status=status, images=len( r['sources'] ), errors=len( r['errors'] ),
+                     **{ k: round( v, 4 ) for k, v in stages.items() }, **fields )
+        for k in ( 'open', 'sample', 'write' ):
+            metrics.add( 'stage_seconds_total', stages[ k ], stage=k )
+        metrics.add( 'days_total', status=status )
+        metrics.set( 'days_done', metrics.get('days_done') + 1 )
+        metrics.set( 'last_day_timestamp_seconds', round( time.time(), 3 ) )
+        metrics.writeProm()
+
+    def removeSources(sources):
+        for src in sources: getDataSetGpm.releaseSource( src, download_keep )
+
+    def getTotalPrecipitation(sources, labelDate):
+        """
+        return: stations_total of sets(values of columns by id), seconds of stages{ 'open', 'sample', 'write' }
+        """
         def getStationsPrecipitations(source):
             """
             Args:
                 source: Source of Dataset
+            Return: ( values of sets, array of grid or None, seconds of open, seconds of sample )
             """
+            t = time.perf_counter()
             ds = gdal.Open( source, GA_ReadOnly )
-            vp = ValuePixel( ds )
-            vp.setBand(1)
-            item = lambda s: ( s['id'], vp( s['long'], s['lat'] ) )
-            station_precipitation = [ item( s ) for s in stations ]
+            secondsOpen = time.perf_counter() - t
+            values = setsPixels( ds )
+            arry = None if dailyGrid is None else dailyGrid( ds )
             ds = None
+            secondsSample = time.perf_counter() - t - secondsOpen
+            metrics.log( 'sample', date=labelDate, image=os.path.basename( source ),
+                         open=round( secondsOpen, 4 ), sample=round( secondsSample, 4 ) )
 
-            return station_precipitation
+            return values, arry, secondsOpen, secondsSample
         
-        r = getDatasetSources()
-        sources = r['sources']
-        errors = r['errors']
-
-        msg = f"{labelDate} - Precipitations calculating..."
-        printStatus( msg )
-        pool = ThreadPool(processes=4)
-        mapResult = pool.map_async( getStationsPrecipitations, sources )
-        stations_total = { k['id']: 0 for k in stations }
-        for results in mapResult.get():
-            for k,v in results: stations_total[ k ] += v
-        pool.close()
-        if not download_keep:
-            for src in sources: os.remove( src )
-        sources.clear()
-        return { 'stations_total': stations_total, 'errors': errors }
+        totals = None # By set
+        totalGrid = None
+        stages = { 'open': 0.0, 'sample': 0.0, 'write': 0.0 }
+        scale = getDataSetGpm.scale # Unit of 30min images
+        for values, arry, secondsOpen, secondsSample in poolSample.imap_unordered( getStationsPrecipitations, sources ):
+            stages['open'] += secondsOpen
+            stages['sample'] += secondsSample
+            totals = addTotals( totals, values, scale )
+            if arry is None:
+                continue
+            if totalGrid is None:
+                totalGrid = arry * scale
+            else:
+                totalGrid += arry * scale
+        if not totalGrid is None:
+            t = time.perf_counter()
+            dailyGrid.save( labelDate, totalGrid / FACTOR_MM_DAY, len( sources ) )
+            stages['write'] += time.perf_counter() - t
+        setsTotal = []
+        for idx, sampler in enumerate( setsPixels.samplers ):
+            values = np.zeros( ( len( sampler.ids ), len( sampler.columns ) ) )
+            if not totals is None:
+                values = sampler.reduce( totals[ idx ] )
+            setsTotal.append( dict( zip( sampler.ids, values.tolist() ) ) )
+        return setsTotal, stages
 
     SEP_CSV = ';'
     FACTOR_MM_DAY = 10
+    HEAD_CHECKPOINT = [ 'date', 'status', 'errors' ]
+    STATUS_OK, STATUS_ERROR = 'ok', 'error'
+    if metrics is None:
+        metrics = JobMetrics() # Without log and textfile
     
-    stations = getStationsCsv(pathfileCoordCsv) # [ { 'id', 'lat', 'long' }, ... ]
-
-    suffix = f"{dateIni.strftime('%Y-%m-%d')}_{dateEnd.strftime('%Y-%m-%d')}"
-    name = os.path.splitext( os.path.basename( pathfileCoordCsv ) )[0]
-    name = f"{name}_daily_precip_{suffix}"
-    filePathOut = f"{name}.csv"
-    fwOut = createWriteFile( filePathOut, ['id', 'date', 'total_mm'] )
-
-    filePathError = f"{name}_error.csv"
-    fwError = createWriteFile( filePathError, ['date', 'message'] )
-    totalError = 0
+    pathfiles = [ pathfileCoordCsv ] if isinstance( pathfileCoordCsv, str ) else pathfileCoordCsv
+    if samplers is None:
+        samplers = [ StationsPixels.fromCsv( p, SEP_CSV ) for p in pathfiles ]
+    setsPixels = SetsPixels( samplers )
+    dataSets = [ createSet( p, s ) for p, s in zip( pathfiles, samplers ) ]
     
     delta = dateEnd - dateIni
-    totalDays = delta.days + 1
-    msg = f"{totalDays} Days | {GpmDataset.IMAGES_DAY} Images/Day | {len( stations )} Stations"
+    totalDaysRange = delta.days + 1
+    days = ( dateIni + timedelta(days=d) for d in range( totalDaysRange ) )
+    isDone = lambda labelDate: all( labelDate in ds['daysDone'] for ds in dataSets )
+    days = [ dt for dt in days if not isDone( dt.strftime('%Y-%m-%d') ) ]
+    totalDays = len( days )
+    totalDaysDone = delta.days + 1 - totalDays
+    totalIds = sum( len( ds['ids'] ) for ds in dataSets )
+    msg = f"{totalDays} Days | {getDataSetGpm.images_day} Images({getDataSetGpm.range})/Day | {totalIds} Stations/Zones"
+    msg = f"{msg} | {len( dataSets )} Sets | {downloads} Downloads"
+    if totalDaysDone:
+        msg = f"{msg} | {totalDaysDone} Days done(resume)"
     print( msg )
+    metrics.set( 'days', delta.days + 1 )
+    metrics.set( 'days_done', totalDaysDone )
+    # Pipeline: download days(queue_days ahead) while the current day is calculated
+    poolFetch = ThreadPool( processes=downloads )
+    poolSample = ThreadPool( processes=4 )
+    queueDays = queue.Queue( maxsize=queue_days )
+    stopFetch = threading.Event()
+    threadFetch = threading.Thread( target=fetchDays, daemon=True )
+    threadFetch.start()
     c_days = 0
     try:
-        for d in range( totalDays ):
-            dt = ( dateIni + timedelta(days=d) )
+        for _d in range( totalDays ):
+            r = queueDays.get()
+            if 'exception' in r:
+                raise r['exception']
+            dt = r['v_datetime']
             c_days += 1
             labelDate = dt.strftime('%Y-%m-%d')
             label = f"{labelDate} ({c_days}/{totalDays})"
-            r  = getTotalPrecipitation( dt, label)
-            if r['errors']:
-                totalError += len( r['errors'] )
-                items = ( [ labelDate, error ] for error in r['errors'] )
-                fwError['writerows']( items )
-                fwError['csvfile'].flush()
-            items = ( [ k, labelDate, v/FACTOR_MM_DAY ] for k, v in r['stations_total'].items() )
-            fwOut['writerows']( items )
-            fwOut['csvfile'].flush()
+            msg = f"{label} - Precipitations calculating..."
+            printStatus( msg )
+            try:
+                setsTotal, stages = getTotalPrecipitation( r['sources'], labelDate )
+            finally: # Sources(pins of cache, memory and downloads) released with error of sampling
+                removeSources( r['sources'] )
+            t = time.perf_counter()
+            status = STATUS_OK
+            for dataSet, stations_total in zip( dataSets, setsTotal ):
+                if labelDate in dataSet['daysDone']: # Resume by set
+                    continue
+                status = writeSet( dataSet, labelDate, stations_total, r['errors'] )
+            stages['write'] += time.perf_counter() - t
+            addMetricsDay( labelDate, status, r, stages )
     except Exception as e:
         print(f"\nError processing: {str(e)}\n")
-    fwOut['csvfile'].close()
-    fwError['csvfile'].close()
-    msg = f"Saved '{filePathOut}'."
-    printStatus( msg )
-    if not totalError:
-        os.remove( filePathError )
-    else:
-        msg = f"\nErrors read images ({totalError} images): '{filePathError}'\r"
-        print( msg )
+    stopFetch.set()
+    threadFetch.join()
+    while not queueDays.empty():
+        r = queueDays.get()
+        if 'sources' in r: removeSources( r['sources'] )
+    poolFetch.close()
+    poolSample.close()
+    for idx, dataSet in enumerate( dataSets ):
+        if idx: print()
+        closeSet( dataSet )
+    return [ dataSet['dailyMatrix'] for dataSet in dataSets ]
+
+
+def createGpmDataset(email, options):
+    cache_bytes = int( options['cache_gb'] * 1024 ** 3 )
+    args = {
+        'timeout': options['timeout'], 'retries': options['retries'], 'url_root': options['url_root'],
+        'dir_cache': options['dir_cache'], 'cache_bytes': cache_bytes,
+        'in_memory': options['in_memory'],
+        'rangeImage': options['range'], 'iniHourBefore': options['ini_hour'],
+        'dir_archive': options['dir_archive'], 'archive_bbox': options['archive_bbox']
+    }
+    return GpmDataset( email, **args )
 
+def createMetrics(filepath_csv, ini_date, end_date, options):
+    """
+    Metrics of run(or shard): log '<name>_metrics.jsonl' and textfile '<prometheus>/<name>.prom'
+    Args:
+        filepath_csv: first set
+    """
+    name = getNameDailyGpm( filepath_csv, ini_date, end_date )
+    filepath_log = f"{name}_metrics.jsonl" if options['metrics'] else None
+    filepath_prom = None
+    if not options['prometheus'] is None:
+        os.makedirs( options['prometheus'], exist_ok=True )
+        filepath_prom = os.path.join( options['prometheus'], f"{name}.prom" )
+    return JobMetrics( filepath_log, filepath_prom, { 'job': name } )
 
-def run(email, ini_date, end_date, filepath_csv, download_keep):
+def checkArchiveBbox(filepaths_csv, options):
+    """
+    The stations(or zones) of sets must be inside of bounding box of archive(images cropped),
+    outside of image the values are 0 mm(see StationsPixels.sample)
+    Return: { 'isOk', 'message' }
+    """
+    if options['dir_archive'] is None:
+        return { 'isOk': True }
+    minX, minY, maxX, maxY = options['archive_bbox']
+    wkt = None
+    if options['zones']:
+        srs = osr.SpatialReference()
+        srs.ImportFromEPSG( 4326 ) # SRS of images
+        wkt = srs.ExportToWkt()
+    for filepath in filepaths_csv:
+        sampler = ZonesPixels( filepath, None, 1 ) if options['zones'] else StationsPixels.fromCsv( filepath )
+        bbox = sampler.getBbox( wkt )
+        if bbox[0] < minX or bbox[1] < minY or bbox[2] > maxX or bbox[3] > maxY:
+            label = ', '.join( f"{v:.4f}" for v in bbox )
+            msg = f"'{filepath}': bounding box({label}) is outside of archive_bbox{tuple( options['archive_bbox'] )}"
+            return { 'isOk': False, 'message': msg }
+    return { 'isOk': True }
+
+def isMatrix(options):
+    return bool( options['matrix'] ) or not options['sqlite'] is None
+
+def runDailyGpm(gpmDS, ini_date, end_date, filepaths_csv, options, printStatus):
+    """
+    Args:
+        filepaths_csv: list of sets(CSV of stations or vector of zones)
+    Return: List of DailyMatrix(see isMatrix) or None, by set
+    """
+    keep = options['download_keep'] or not options['dir_cache'] is None or not options['dir_archive'] is None # Images of cache(or archive) are not removed
+    dailyGrid = None
+    if not options['dir_grid'] is None:
+        dailyGrid = DailyGrid( options['dir_grid'], options['grid_bbox'] )
+    samplers = None
+    if options['zones']:
+        samplers = [ ZonesPixels( f, options['zone_field'], options['supersample'] ) for f in filepaths_csv ]
+    metrics = createMetrics( filepaths_csv[0], ini_date, end_date, options )
+    args = ( options['downloads'], options['queue_days'], options['resume'], options['retry_errors'], isMatrix( options ), dailyGrid, metrics, samplers, options.get( 'checkpoint_keep', False ) )
+    try:
+        return saveCsvDailyGpm( ini_date, end_date, filepaths_csv, gpmDS, keep, printStatus, *args )
+    finally:
+        metrics.close()
+
+def saveMatrix(dailyMatrix, name, options, printStatus):
+    """
+    Save the matrix(formats of options) and load in SQLite(table of zones for zones)
+    """
+    for format in options['matrix']:
+        filepath = f"{name}.{format}"
+        r = dailyMatrix.save( filepath, format )
+        msg = f"Saved '{filepath}'." if r['isOk'] else r['message']
+        printStatus( msg )
+    if not options['sqlite'] is None:
+        if options['zones']:
+            table = GpmDataset.TABLE_SQLITE_ZONES
+            total = dailyMatrix.saveSqlite( options['sqlite'], table, GpmDataset.COLUMNS_SQLITE_ZONES )
+        else:
+            table = GpmDataset.TABLE_SQLITE
+            total = dailyMatrix.saveSqlite( options['sqlite'], table )
+        msg = f"Inserted {total} rows in '{table}' ({options['sqlite']})."
+        printStatus( msg )
+
+def runShard(args):
+    """
+    Worker of run(processes), one range of dates
+    Args:
+        args: ( email, ini_date, end_date, filepaths_csv, options )
+    """
+    email, ini_date, end_date, filepaths_csv, options = args
+    options = { **options, 'checkpoint_keep': True } # Removed by mergeShards
+    gpmDS = createGpmDataset( email, options )
+    dailyMatrices = runDailyGpm( gpmDS, ini_date, end_date, filepaths_csv, options, lambda message: None )
+    for filepath_csv, dailyMatrix in zip( filepaths_csv, dailyMatrices ):
+        if not dailyMatrix is None:
+            dailyMatrix.saveNpz( f"{getNameDailyGpm( filepath_csv, ini_date, end_date )}_matrix.npz" )
+    return ini_date, end_date
+
+def getShards(ini_date, end_date, total):
+    """
+    Return: List of ( ini_date, end_date ), continuous ranges of dates
+    """
+    days = ( end_date - ini_date ).days + 1
+    size = -( -days // total ) # Ceil
+    shards = []
+    for d in range( 0, days, size ):
+        ini = ini_date + timedelta( days=d )
+        end = ini_date + timedelta( days=min( d + size, days ) - 1 )
+        shards.append( ( ini, end ) )
+    return shards
+
+def splitShards(filepaths_csv, ini_date, end_date, shards):
+    """
+    Split(by dates of shards) the CSVs of full range(output, error and checkpoint) of sets, and remove them.
+    Inverse of mergeShards, for resume: each shard resumes from own CSVs(see saveCsvDailyGpm)
+    """
+    def split(filepath_csv, suffix, idxDate):
+        filepath = f"{getNameDailyGpm( filepath_csv, ini_date, end_date )}{suffix}"
+        if not os.path.exists( filepath ):
+            return
+        labels = [ ( ini.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d') ) for ini, end in shards ]
+        files = [ open( f"{getNameDailyGpm( filepath_csv, *shard )}{suffix}", mode='w', newline='' ) for shard in shards ]
+        try:
+            writers = [ csv.writer( f, delimiter=';' ) for f in files ]
+            with open( filepath, newline='' ) as csvfile:
+                rows = csv.reader( csvfile, delimiter=';' )
+                head = next( rows, None )
+                if head:
+                    for writer in writers: writer.writerow( head )
+                for row in rows:
+                    if len( row ) <= idxDate:
+                        continue
+                    for ( ini, end ), writer in zip( labels, writers ):
+                        if ini <= row[ idxDate ] <= end:
+                            writer.writerow( row )
+                            break
+        finally:
+            for f in files: f.close()
+        os.remove( filepath )
+
+    for filepath_csv in filepaths_csv:
+        split( filepath_csv, '.csv', 1 )
+        split( filepath_csv, '_error.csv', 0 )
+        split( filepath_csv, '_checkpoint.csv', 0 )
+
+def mergeShards(filepaths_csv, ini_date, end_date, shards):
+    """
+    Merge(by order of date) the CSVs of shards(output, error and checkpoint) of sets and log of metrics, and remove them.
+    The checkpoint is removed when all days are OK(without errors)
+    Return: List of { 'output', 'error' } by set
+    """
+    def merge(filepath_csv, suffix, head=True):
+        """
+        Args:
+            head: CSV with head(only from first shard), or lines appended(log)
+        """
+        filepaths = [ f"{getNameDailyGpm( filepath_csv, *shard )}{suffix}" for shard in shards ]
+        filepaths = [ f for f in filepaths if os.path.exists( f ) ]
+        if not filepaths:
+            return None
+        filepathOut = f"{getNameDailyGpm( filepath_csv, ini_date, end_date )}{suffix}"
+        with open( filepathOut, mode='w' if head else 'a' ) as fOut:
+            for idx, filepath in enumerate( filepaths ):
+                with open( filepath ) as fIn:
+                    if head:
+                        line = fIn.readline()
+                        if idx == 0: fOut.write( line )
+                    shutil.copyfileobj( fIn, fOut )
+                os.remove( filepath )
+        return filepathOut
+
+    def removeCheckpoint(filepath):
+        if filepath is None:
+            return
+        with open( filepath ) as csvfile:
+            rows = csv.reader( csvfile, delimiter=';' )
+            next( rows, None )
+            days = { row[0] for row in rows if len( row ) == 3 and row[2] == '0' } # date, status, errors
+        if len( days ) == ( end_date - ini_date ).days + 1:
+            os.remove( filepath )
+
+    results = []
+    for filepath_csv in filepaths_csv:
+        filepathOut = merge( filepath_csv, '.csv' )
+        filepathError = merge( filepath_csv, '_error.csv' )
+        removeCheckpoint( merge( filepath_csv, '_checkpoint.csv' ) )
+        results.append( { 'output': filepathOut, 'error': filepathError } )
+    merge( filepaths_csv[0], '_metrics.jsonl', False )
+    return results
+
+def getFilepathsCsv(paths, zones=False):
+    """
+    Args:
+        paths: files or directories(files of sets: CSV or vector of zones)
+    Return: { 'isOk', 'message' or 'filepaths' }
+    """
+    extensions = ( '.shp', '.gpkg', '.geojson' ) if zones else ( '.csv', )
+    filepaths = []
+    for path in paths:
+        if os.path.isdir( path ):
+            names = sorted( n for n in os.listdir( path ) if n.lower().endswith( extensions ) )
+            filepaths.extend( os.path.join( path, n ) for n in names )
+        elif os.path.isfile( path ):
+            filepaths.append( path )
+        else:
+            return { 'isOk': False, 'message': f"Missing file '{path}'" }
+    if not filepaths:
+        return { 'isOk': False, 'message': f"Missing files({', '.join( extensions )}) in {paths}" }
+    names = [ os.path.splitext( os.path.basename( f ) )[0] for f in filepaths ]
+    duplicates = sorted( { n for n in names if names.count( n ) > 1 } )
+    if duplicates:
+        return { 'isOk': False, 'message': f"Names of sets must be unique(outputs): {duplicates}" }
+    return { 'isOk': True, 'filepaths': filepaths }
+
+def run(email, ini_date, end_date, filepaths_csv, options):
+    """
+    Args:
+        filepaths_csv: list of sets(see getFilepathsCsv)
+        options: { 'download_keep', 'in_memory', 'resume', 'retry_errors', 'downloads', 'queue_days',
+                   'timeout', 'retries', 'dir_cache', 'cache_gb', 'processes', 'matrix', 'sqlite',
+                   'dir_grid', 'grid_bbox', 'range', 'ini_hour', 'url_root', 'metrics', 'prometheus',
+                   'zones', 'zone_field', 'supersample', 'dir_archive', 'archive_bbox' }
+    """
     def printStatus(message):
         msg = f"\r{message.ljust(100)}"
         sys.stdout.write( msg )
@@ -330,7 +1345,18 @@ def run(email, ini_date, end_date, filepath_csv, download_keep):
         print( msg )
         return 0
 
-    gpmDS = GpmDataset( email )
+    if options['range'] != 'auto':
+        r = GpmDataset.checkRange( options['range'], options['ini_hour'] )
+        if not r['isOk']:
+            print( r['message'] )
+            return 1
+
+    r = checkArchiveBbox( filepaths_csv, options )
+    if not r['isOk']:
+        print( r['message'] )
+        return 1
+
+    gpmDS = createGpmDataset( email, options )
     r = gpmDS.isLive( ini_date )
     if not r['isOk']:
         print( r['message'])
@@ -339,7 +1365,33 @@ def run(email, ini_date, end_date, filepath_csv, download_keep):
     dtIni = datetime.now()
     print('Started ', dtIni)
 
-    saveCsvDailyGpm(ini_date, end_date, filepath_csv, gpmDS, download_keep, printStatus )
+    if options['processes'] > 1:
+        shards = getShards( ini_date, end_date, options['processes'] )
+        if options['resume']: # Days done of previous run(sharded or not)
+            splitShards( filepaths_csv, ini_date, end_date, shards )
+        tasks = [ ( email, ini, end, filepaths_csv, options ) for ini, end in shards ]
+        with Pool( processes=len( shards ) ) as pool:
+            for ini, end in pool.imap_unordered( runShard, tasks ):
+                msg = f"Finished shard {ini.strftime('%Y-%m-%d')} - {end.strftime('%Y-%m-%d')}"
+                printStatus( msg )
+        for idx, r in enumerate( mergeShards( filepaths_csv, ini_date, end_date, shards ) ):
+            msg = f"Saved '{r['output']}'."
+            if idx: print()
+            printStatus( msg )
+            if r['error']:
+                print( f"\nErrors read images: '{r['error']}'\r" )
+        dailyMatrices = [ None ] * len( filepaths_csv )
+        if isMatrix( options ):
+            for idx, filepath_csv in enumerate( filepaths_csv ):
+                filepaths = [ f"{getNameDailyGpm( filepath_csv, *shard )}_matrix.npz" for shard in shards ]
+                dailyMatrices[ idx ] = DailyMatrix.concat( [ DailyMatrix.loadNpz( f ) for f in filepaths ] )
+                for f in filepaths: os.remove( f )
+    else:
+        dailyMatrices = runDailyGpm( gpmDS, ini_date, end_date, filepaths_csv, options, printStatus )
+    for filepath_csv, dailyMatrix in zip( filepaths_csv, dailyMatrices ):
+        if not dailyMatrix is None:
+            print()
+            saveMatrix( dailyMatrix, getNameDailyGpm( filepath_csv, ini_date, end_date ), options, printStatus )
     
     dtEnd = datetime.now()
     msgDiff = messageDiffDateTime( dtIni, dtEnd )
@@ -351,11 +1403,41 @@ def main():
     parser.add_argument( 'email', action='store', help='Email user for NASA/GPM', type=EmailType('RFC5322') )
     parser.add_argument( 'ini_date', action='store', help='Initial date (YYYY-mm-DD)', type=DateType() )
     parser.add_argument( 'end_date', action='store', help='End date (YYYY-mm-DD)', type=DateType() )
-    parser.add_argument( 'filepath_csv', action='store', help='Filepath of CSV with coordinates of stations', type=FilePathType() )
+    parser.add_argument( 'filepath_csv', action='store', nargs='+', help='Filepaths(or directories) of CSV with coordinates of stations(or vector of zones, see --zones), each one with own outputs', type=str )
+    parser.add_argument( '--range', action='store', default=GpmDataset.RANGE, choices=list( GpmDataset.RANGES ) + ['auto'], help=f"Range of images, 'auto' for less images by day(default: {GpmDataset.RANGE})" )
+    parser.add_argument( '--ini_hour', action='store', default=GpmDataset.CONFIG_TIME['iniHourBefore'], help=f"Hour of start of day in previous day, 24 for current day(default: {GpmDataset.CONFIG_TIME['iniHourBefore']})", type=int )
     parser.add_argument( '-d', '--download_keep', action="store_true", help='Keep downloads')
+    parser.add_argument( '-m', '--in_memory', action="store_true", help='Images in memory(/vsimem/), without disk(except with cache)')
+    parser.add_argument( '-r', '--resume', action="store_true", help='Continue from days missing in output(checkpoint)')
+    parser.add_argument( '--retry_errors', action="store_true", help='With resume, process again the days with errors of images')
+    parser.add_argument( '--downloads', action='store', default=4, help='Number of concurrent downloads(default: 4)', type=int )
+    parser.add_argument( '--queue_days', action='store', default=1, help='Days downloaded ahead of calculation(default: 1)', type=int )
+    parser.add_argument( '--timeout', action='store', default=30, help='Timeout of download in seconds(default: 30)', type=int )
+    parser.add_argument( '--retries', action='store', default=3, help='Retries of download with backoff(default: 3)', type=int )
+    parser.add_argument( '--dir_cache', action='store', default=None, help='Directory of cache of images(LRU)', type=str )
+    parser.add_argument( '--dir_archive', action='store', default=None, help='Directory of archive of images cropped by bbox(Int16, compressed), read before download', type=str )
+    parser.add_argument( '--archive_bbox', action='store', default=GpmDataset.ARCHIVE_BBOX, nargs=4, metavar=('MIN_X', 'MIN_Y', 'MAX_X', 'MAX_Y'), help=f"Bounding box of archive(default: {GpmDataset.ARCHIVE_BBOX}, Brazil)", type=float )
+    parser.add_argument( '--cache_gb', action='store', default=50.0, help='Limit of cache in GB(default: 50)', type=float )
+    parser.add_argument( '-p', '--processes', action='store', default=1, help='Number of processes, each one with a range of dates(default: 1)', type=int )
+    parser.add_argument( '--matrix', action='append', default=[], choices=DailyMatrix.FORMATS, help='Save matrix station x date(float32), can be repeated' )
+    parser.add_argument( '--dir_grid', action='store', default=None, help='Directory for GeoTiff of day(sum of images, mm)', type=str )
+    parser.add_argument( '--grid_bbox', action='store', default=None, nargs=4, metavar=('MIN_X', 'MIN_Y', 'MAX_X', 'MAX_Y'), help='Bounding box of GeoTiff of day(default: all image)', type=float )
+    parser.add_argument( '-z', '--zones', action="store_true", help='Filepath is vector of polygons(zones), values by zone: mean and max(mm)')
+    parser.add_argument( '--zone_field', action='store', default=None, help='Field of identifier of zone(default: FID)', type=str )
+    parser.add_argument( '--supersample', action='store', default=10, help='Zones: pixels by side of pixel of image for fraction covered(default: 10)', type=int )
+    parser.add_argument( '--url_root', action='store', default=None, help=f"Root of server, ex.: local mock server(default: https://{GpmDataset.HOST})", type=str )
+    parser.add_argument( '--metrics', action="store_true", help='Log(JSON lines) of times of stages(fetch, open, sample and write), bytes, retries and cache hits')
+    parser.add_argument( '--prometheus', action='store', default=None, help='Directory of Prometheus textfile(node exporter) with metrics, updated by day', type=str )
+    parser.add_argument( '--sqlite', action='store', default=None, help=f"Filepath of SQLite for insert in '{GpmDataset.TABLE_SQLITE}'(zones: '{GpmDataset.TABLE_SQLITE_ZONES}')", type=str )
 
     args = parser.parse_args()
-    return run( args.email, args.ini_date, args.end_date, args.filepath_csv, args.download_keep )
+    r = getFilepathsCsv( args.filepath_csv, args.zones )
+    if not r['isOk']:
+        parser.error( r['message'] )
+    options = vars( args )
+    positionals = [ options.pop( k ) for k in ( 'email', 'ini_date', 'end_date' ) ]
+    options.pop('filepath_csv')
+    return run( *positionals, r['filepaths'], options )
 
 if __name__ == "__main__":
     sys.exit( main() )
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+Name                 : Benchmark of daily precipitation GPM
+Description          : Throughput of daily_precipitation_gpm_http.py with local
+                       mock server(see mod_py/gpmmockserver.py) or other server(--url_root)
+                       For each total of downloads:
+                       - Stages: fetch(download + open), open, sample and write,
+                         total of seconds and milliseconds by tile
+                       - Pipeline: saveCsvDailyGpm(queue of days), stages by JobMetrics
+                       Report: tiles/s, bytes/s(MB/s), hits of archive and seconds by stage
+Date                 : October, 2026
+copyright            : (C) 2026 by Luiz Motta
+email                : motta.luiz@gmail.com
+
+Dependences:
+- mod_py
+- daily_precipitation_gpm_http.py
+
+Example:
+    gpm_benchmark_http.py --downloads 1 --downloads 4 --downloads 8 --latency 0.05
+
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+__author__ = 'Luiz Motta'
+__date__ = '2026-10-18'
+__copyright__ = '(C) 2026, Luiz Motta'
+__revision__ = '$Format:%H$'
+
+import sys, os, csv, json, time, tempfile
+from datetime import datetime, timedelta
+from multiprocessing.pool import ThreadPool
+
+import numpy as np
+
+from osgeo import gdal
+from osgeo.gdalconst import GA_ReadOnly
+gdal.UseExceptions()
+
+import argparse
+from mod_py.argparse_types import DateType, EmailType, FilePathType
+from mod_py.gpmmockserver import GpmMockServer
+from mod_py.jobmetrics import JobMetrics
+
+from daily_precipitation_gpm_http import GpmDataset, StationsPixels, saveCsvDailyGpm
+
+
+def createStationsCsv(filepath, total, bbox, seed=0):
+    """
+    CSV(id;lat;long) with random stations inside of bbox( minX, minY, maxX, maxY )
+    """
+    rng = np.random.default_rng( seed )
+    minX, minY, maxX, maxY = bbox
+    xs = rng.uniform( minX, maxX, total )
+    ys = rng.uniform( minY, maxY, total )
+    with open( filepath, mode='w' ) as csvfile:
+        writer = csv.writer( csvfile, delimiter=';' )
+        writer.writerow( [ 'id', 'lat', 'long' ] )
+        writer.writerows( [ f"S{idx:05}", y, x ] for idx, ( x, y ) in enumerate( zip( xs, ys ) ) )
+
+def getStations(filepath):
+    with open( filepath ) as csvfile:
+        rows = csv.reader( csvfile, delimiter=';' )
+        next( rows )
+        stations = [ ( row[0], float( row[1] ), float( row[2] ) ) for row in rows ]
+    return stations
+
+def getSizeSource(source):
+    stat = gdal.VSIStatL( source )
+    return 0 if stat is None else stat.size
+
+def benchmarkStages(gpmDS, days, filepath_csv, downloads):
+    """
+    Stages by tile(fetch, open, sample) and by day(write), without pipeline
+    Return: { 'tiles', 'errors', 'bytes', 'cache_hits', 'seconds', 'stages': { stage: seconds } }
+    """
+    def fetch(valueDatetime):
+        t = time.perf_counter()
+        r = gpmDS( valueDatetime )
+        r['seconds'] = time.perf_counter() - t
+        if r['isOk']:
+            r['source'] = r['dataset'].GetDescription()
+            r['dataset'] = None
+        return r
+
+    stations = getStations( filepath_csv )
+    stationsPixels = StationsPixels( [ s[2] for s in stations ], [ s[1] for s in stations ] )
+    stages = { 'fetch': 0.0, 'open': 0.0, 'sample': 0.0, 'write': 0.0 }
+    tiles, errors, total_bytes, cache_hits = 0, 0, 0, 0
+    filepathOut = 'benchmark_stages.csv'
+    pool = ThreadPool( processes=downloads )
+    tIni = time.perf_counter()
+    with open( filepathOut, mode='w' ) as csvfile:
+        writer = csv.writer( csvfile, delimiter=';' )
+        for dt in days:
+            totals = np.zeros( len( stations ), dtype=np.float64 )
+            for r in pool.map( fetch, gpmDS.valuesDatatime( dt ) ):
+                stages['fetch'] += r['seconds']
+                if not r['isOk']:
+                    errors += 1
+                    continue
+                tiles += 1
+                cache_hits += int( r['cache'] )
+                total_bytes += getSizeSource( r['source'] )
+                t = time.perf_counter()
+                ds = gdal.Open( r['source'], GA_ReadOnly )
+                stages['open'] += time.perf_counter() - t
+                t = time.perf_counter()
+                totals += stationsPixels( ds ) * gpmDS.scale
+                stages['sample'] += time.perf_counter() - t
+                ds = None
+                GpmDataset.removeSource( r['source'], not gpmDS.dir_archive is None ) # Keep archive
+            t = time.perf_counter()
+            labelDate = dt.strftime('%Y-%m-%d')
+            writer.writerows( [ s[0], labelDate, v / 10 ] for s, v in zip( stations, totals.tolist() ) )
+            csvfile.flush()
+            stages['write'] += time.perf_counter() - t
+    seconds = time.perf_counter() - tIni
+    pool.close()
+    return { 'tiles': tiles, 'errors': errors, 'bytes': total_bytes, 'cache_hits': cache_hits, 'seconds': seconds, 'stages': stages }
+
+def benchmarkPipeline(gpmDS, days, filepath_csv, downloads, queue_days):
+    """
+    Return: { 'tiles', 'errors', 'bytes', 'cache_hits', 'seconds', 'stages': { stage: seconds } }
+    """
+    metrics = JobMetrics()
+    t = time.perf_counter()
+    keep = not gpmDS.dir_archive is None
+    saveCsvDailyGpm( days[0], days[-1], filepath_csv, gpmDS, keep, lambda message: None, downloads, queue_days, metrics=metrics )
+    seconds = time.perf_counter() - t
+    stages = { k: metrics.get( 'stage_seconds_total', stage=k ) for k in ( 'fetch', 'open', 'sample', 'write' ) }
+    return {
+        'tiles': metrics.get( 'tiles_total', status='ok' ), 'errors': metrics.get( 'tiles_total', status='error' ),
+        'bytes': metrics.get('bytes_total'), 'cache_hits': metrics.get('cache_hits_total'), 'seconds': seconds, 'stages': stages
+    }
+
+def printResult(label, result):
+    seconds = result['seconds']
+    msg = f"{label.ljust(24)} {result['tiles']:6} tiles {seconds:8.2f} s {result['tiles'] / seconds:8.2f} tiles/s"
+    msg = f"{msg} {result['bytes'] / seconds / 1024 ** 2:8.2f} MB/s | errors {result['errors']} | hits(cache or archive) {result['cache_hits']}"
+    tiles = max( result['tiles'], 1 )
+    stages = ( f"{k} {v:.2f} s({1000 * v / tiles:.1f} ms/tile)" for k, v in result['stages'].items() )
+    msg = f"{msg}\n{''.ljust(24)} {' | '.join( stages )}"
+    print( msg )
+
+def run(email, ini_date, end_date, options):
+    """
+    Args:
+        options: { 'url_root', 'filepath_csv', 'stations', 'downloads', 'queue_days', 'in_memory', 'range', 'ini_hour',
+                   'timeout', 'retries', 'latency', 'failure', 'images', 'json', 'dir_archive' }
+    """
+    if ini_date > end_date:
+        print(f"ini_date({ini_date.strftime('%Y-%m-%d')}) > end_date({end_date.strftime('%Y-%m-%d')})")
+        return 0
+
+    if options['range'] != 'auto':
+        r = GpmDataset.checkRange( options['range'], options['ini_hour'] )
+        if not r['isOk']:
+            print( r['message'] )
+            return 1
+
+    server, url_root = None, options['url_root']
+    if url_root is None:
+        server = GpmMockServer( email, latency=options['latency'], failure=options['failure'], images=options['images'] )
+        url_root = server.start()
+    days = [ ini_date + timedelta( days=d ) for d in range( ( end_date - ini_date ).days + 1 ) ]
+    cwd = os.getcwd()
+    dir_archive = None if options['dir_archive'] is None else os.path.join( cwd, options['dir_archive'] )
+    results = []
+    with tempfile.TemporaryDirectory() as dirTemp:
+        os.chdir( dirTemp ) # Downloads and outputs
+        filepath_csv = options['filepath_csv']
+        if not filepath_csv is None:
+            filepath_csv = os.path.join( cwd, filepath_csv )
+        else:
+            filepath_csv = os.path.join( dirTemp, 'benchmark.csv' )
+            createStationsCsv( filepath_csv, options['stations'], ( -74.0, -34.0, -34.0, 6.0 ) )
+        print(f"Server '{url_root}' | {len( days )} Days | {len( getStations( filepath_csv ) )} Stations")
+        args = {
+            'timeout': options['timeout'], 'retries': options['retries'], 'url_root': url_root,
+            'in_memory': options['in_memory'], 'rangeImage': options['range'], 'iniHourBefore': options['ini_hour']
+        }
+        def getGpmDataset(mode, downloads):
+            """
+            Each mode and downloads with own archive, not filled by the previous benchmark
+            """
+            dirMode = None if dir_archive is None else os.path.join( dir_archive, f"{mode}_{downloads}" )
+            return GpmDataset( email, dir_archive=dirMode, **args )
+
+        try:
+            for downloads in options['downloads']:
+                r = benchmarkStages( getGpmDataset( 'stages', downloads ), days, filepath_csv, downloads )
+                printResult( f"Stages({downloads} downloads)", r )
+                results.append( { 'mode': 'stages', 'downloads': downloads, **r } )
+                gpmDS = getGpmDataset( 'pipeline', downloads )
+                r = benchmarkPipeline( gpmDS, days, filepath_csv, downloads, options['queue_days'] )
+                printResult( f"Pipeline({downloads} downloads)", r )
+                results.append( { 'mode': 'pipeline', 'downloads': downloads, **r } )
+        finally:
+            os.chdir( cwd )
+            if not server is None:
+                server.stop()
+                print(f"Server: {server.stats}")
+    if not options['json'] is None:
+        with open( options['json'], mode='w' ) as f:
+            json.dump( results, f, indent=2 )
+        print(f"Saved '{options['json']}'.")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark of daily precipitation GPM(local mock server).' )
+    parser.add_argument( '--email', action='store', default='benchmark@mock.org', help='Email user(default: benchmark@mock.org)', type=EmailType('RFC5322') )
+    parser.add_argument( '--ini_date', action='store', default=datetime( 2020, 1, 1 ), help='Initial date (default: 2020-01-01)', type=DateType() )
+    parser.add_argument( '--end_date', action='store', default=datetime( 2020, 1, 2 ), help='End date (default: 2020-01-02)', type=DateType() )
+    parser.add_argument( '--url_root', action='store', default=None, help='Root of server(default: local mock server)', type=str )
+    parser.add_argument( '--filepath_csv', action='store', default=None, help='Filepath of CSV with coordinates of stations(default: random stations)', type=FilePathType() )
+    parser.add_argument( '--stations', action='store', default=1000, help='Total of random stations(default: 1000)', type=int )
+    parser.add_argument( '--downloads', action='append', default=None, help='Number of concurrent downloads, can be repeated(default: 4)', type=int )
+    parser.add_argument( '--queue_days', action='store', default=1, help='Days downloaded ahead of calculation(default: 1)', type=int )
+    parser.add_argument( '-m', '--in_memory', action="store_true", help='Images in memory(/vsimem/)')
+    parser.add_argument( '--range', action='store', default=GpmDataset.RANGE, choices=list( GpmDataset.RANGES ) + ['auto'], help=f"Range of images(default: {GpmDataset.RANGE})" )
+    parser.add_argument( '--ini_hour', action='store', default=GpmDataset.CONFIG_TIME['iniHourBefore'], help=f"Hour of start of day in previous day(default: {GpmDataset.CONFIG_TIME['iniHourBefore']})", type=int )
+    parser.add_argument( '--dir_archive', action='store', default=None, help='Directory of archive of images(cropped) by mode and downloads, filled by first run', type=str )
+    parser.add_argument( '--timeout', action='store', default=30, help='Timeout of download in seconds(default: 30)', type=int )
+    parser.add_argument( '--retries', action='store', default=3, help='Retries of download with backoff(default: 3)', type=int )
+    parser.add_argument( '--latency', action='store', default=0.0, help='Mock server: seconds before each response(default: 0)', type=float )
+    parser.add_argument( '--failure', action='store', default=0.0, help='Mock server: probability of status 503(default: 0)', type=float )
+    parser.add_argument( '--images', action='store', default=4, help='Mock server: total of different random images(default: 4)', type=int )
+    parser.add_argument( '--json', action='store', default=None, help='Filepath of JSON with results', type=str )
+
+    args = parser.parse_args()
+    options = vars( args )
+    if options['downloads'] is None:
+        options['downloads'] = [ 4 ]
+    positionals = [ options.pop( k ) for k in ( 'email', 'ini_date', 'end_date' ) ]
+    return run( *positionals, options )
+
+if __name__ == "__main__":
+    sys.exit( main() )
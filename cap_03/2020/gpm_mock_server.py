@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+Name                 : GPM mock server
+Description          : Run a local server with synthetic IMERG images
+                       (see mod_py/gpmmockserver.py)
+                       Usage with daily_precipitation_gpm_http.py:
+                         --url_root http://127.0.0.1:PORT
+                       For HTTPS(self-signed certificate), the client use SSL_CERT_FILE=certfile
+Date                 : October, 2026
+copyright            : (C) 2026 by Luiz Motta
+email                : motta.luiz@gmail.com
+
+Dependences:
+- mod_py
+
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+__author__ = 'Luiz Motta'
+__date__ = '2026-10-18'
+__copyright__ = '(C) 2026, Luiz Motta'
+__revision__ = '$Format:%H$'
+
+import sys, time
+
+import argparse
+from mod_py.argparse_types import EmailType
+from mod_py.gpmmockserver import GpmMockServer
+
+
+def run(email, options):
+    """
+    Args:
+        options: { 'host', 'port', 'latency', 'failure', 'certfile', 'keyfile', 'images' }
+    """
+    args = { k: options[ k ] for k in ( 'host', 'port', 'latency', 'failure', 'certfile', 'keyfile', 'images' ) }
+    server = GpmMockServer( email, **args )
+    url_root = server.start()
+    print(f"Serving '{url_root}' (Ctrl+C for stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    server.stop()
+    print(f"\n{server.stats}")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description='Local server with synthetic IMERG images(GeoTiff).' )
+    parser.add_argument( 'email', action='store', help='Email user(user and password of basic authentication)', type=EmailType('RFC5322') )
+    parser.add_argument( '--host', action='store', default='127.0.0.1', help='Host(default: 127.0.0.1)', type=str )
+    parser.add_argument( '--port', action='store', default=8000, help='Port(default: 8000)', type=int )
+    parser.add_argument( '--latency', action='store', default=0.0, help='Seconds before each response(default: 0)', type=float )
+    parser.add_argument( '--failure', action='store', default=0.0, help='Probability of response with status 503(default: 0)', type=float )
+    parser.add_argument( '--certfile', action='store', default=None, help='Certificate for HTTPS(default: HTTP)', type=str )
+    parser.add_argument( '--keyfile', action='store', default=None, help='Private key of certificate', type=str )
+    parser.add_argument( '--images', action='store', default=4, help='Total of different random images(default: 4)', type=int )
+
+    args = parser.parse_args()
+    options = vars( args )
+    return run( options.pop('email'), options )
+
+if __name__ == "__main__":
+    sys.exit( main() )
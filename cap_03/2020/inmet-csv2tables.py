@@ -4,11 +4,159 @@
 import os, sys
 import glob
 import csv
+import shutil, tempfile, hashlib
+import sqlite3
+from datetime import datetime, timedelta
+from multiprocessing import Pool
 import argparse
 
 def getNameCsv(pathfile):
     return pathfile.split( os.path.sep )[-1][:-4]
 
+def getSource(pathfile):
+    """
+    Return: ( name, year ) of source
+    """
+    srcName = getNameCsv( pathfile )
+    return srcName, srcName.split('_')[-1].split('-')[-1]
+
+def getDate(value):
+    """
+    Args:
+        value: 'YYYY/MM/DD', 'YYYY-MM-DD', 'DD/MM/YYYY' or 'DD/MM/YY'
+    Return: ISO date('YYYY-MM-DD') or None
+    """
+    value = value.strip()
+    if len( value ) == 10 and value[4] in '/-':
+        return value.replace('/', '-')
+    for fmt in ( '%d/%m/%Y', '%d/%m/%y' ):
+        try:
+            return datetime.strptime( value, fmt ).strftime('%Y-%m-%d')
+        except ValueError:
+            pass
+    return None
+
+def getHour(value):
+    """
+    Args:
+        value: '0100 UTC' or '01:00'
+    Return: 'HH:MM'
+    """
+    value = value.replace('UTC', '').replace(':', '').strip()
+    return f"{value[:2]}:{value[2:4]}"
+
+def getReal(value):
+    """
+    Return: float or None(empty or -9999)
+    """
+    try:
+        value = float( value )
+    except ValueError:
+        return None
+    return None if value == -9999 else value
+
+
+class InmetDaily():
+    """
+    Aggregates of precipitation by date of one source, in the same pass of rows of table
+    - hours: total of rows and nulls: rows without precipitation
+    - prep_mm_12 and prep_mm_13: sum of hours(UTC) <= 12 and >= 13
+    - prep_mm_24: daily total at 12:00(hours >= 13 of previous date and <= 12 of date),
+      only with precipitation in 24 hours of both dates
+    """
+    HEADER = ( 'source', 'code_wmo', 'data', 'hours', 'nulls', 'prep_mm_12', 'prep_mm_13', 'prep_mm_24' )
+    TYPES = ( 'TEXT', 'TEXT', 'DATE', 'INTEGER', 'INTEGER', 'REAL', 'REAL', 'REAL' )
+    HOURS = 24
+    def __init__(self):
+        self.days = {} # date: [ hours, nulls, prep_mm_12, prep_mm_13 ]
+
+    def add(self, date, hour, prep):
+        """
+        Args:
+            date: date of row(see getDate)
+            hour: hour of row('HHMM UTC' or 'HH:MM')
+            prep: precipitation(None for null)
+        """
+        day = self.days.get( date )
+        if day is None:
+            day = self.days[ date ] = [ 0, 0, 0.0, 0.0 ]
+        day[0] += 1
+        if prep is None:
+            day[1] += 1
+        elif int( hour[:2] ) <= 12:
+            day[2] += prep
+        else:
+            day[3] += prep
+
+    @staticmethod
+    def addDays(date, days):
+        return ( datetime.strptime( date, '%Y-%m-%d' ) + timedelta( days=days ) ).strftime('%Y-%m-%d')
+
+    @classmethod
+    def getPrep24(cls, day, dayPrevious):
+        """
+        Args:
+            day, dayPrevious: ( hours, nulls, prep_mm_12, prep_mm_13 ), None for missing
+        Return: prep_mm_24 or None
+        """
+        if day is None or dayPrevious is None:
+            return None
+        if not day[0] - day[1] == cls.HOURS or not dayPrevious[0] - dayPrevious[1] == cls.HOURS:
+            return None
+        return round( day[2] + dayPrevious[3], 2 )
+
+    def getRows(self, srcName, code_wmo):
+        """
+        Return: rows of HEADER ordered by date, with prep_mm_24 None in first date(see getBoundaries)
+        """
+        days = { getDate( d ): v for d, v in self.days.items() }
+        days.pop( None, None )
+        rows = []
+        for date in sorted( days ):
+            day = days[ date ]
+            prep24 = self.getPrep24( day, days.get( self.addDays( date, -1 ) ) )
+            rows.append( ( srcName, code_wmo, date, day[0], day[1], round( day[2], 2 ), round( day[3], 2 ), prep24 ) )
+        return rows
+
+    @classmethod
+    def getBoundaries(cls, rows):
+        """
+        Return: keys( code_wmo, date ) with prep_mm_24 dependent of other sources(first date and next of last date)
+        """
+        if not rows:
+            return []
+        return [ ( rows[0][1], rows[0][2] ), ( rows[-1][1], cls.addDays( rows[-1][2], 1 ) ) ]
+
+    @classmethod
+    def resolveCsv(cls, filepath, keys):
+        """
+        Update prep_mm_24 of keys( code_wmo, date ) with the previous dates of CSV(two passes, bounded memory)
+        """
+        sep = InmetCsv.SEP_CSV
+        needed = set( keys ).union( ( c, cls.addDays( d, -1 ) ) for c, d in keys )
+        days = {}
+        with open( filepath, mode='r', errors="surrogateescape" ) as f:
+            f.readline() # Header
+            for line in f:
+                values = line.split( sep, 3 )
+                key = ( values[1], values[2] )
+                if key in needed:
+                    values = line.rstrip('\n').split( sep )
+                    days[ key ] = ( int( values[3] ), int( values[4] ), float( values[5] ), float( values[6] ) )
+        filepathTemp = f"{filepath}.tmp"
+        with open( filepath, mode='r', errors="surrogateescape" ) as fIn, open( filepathTemp, mode='w', errors="surrogateescape" ) as fOut:
+            fOut.write( fIn.readline() ) # Header
+            for line in fIn:
+                values = line.split( sep, 3 )
+                key = ( values[1], values[2] )
+                if key in keys:
+                    values = line.rstrip('\n').split( sep )
+                    prep24 = cls.getPrep24( days[ key ], days.get( ( key[0], cls.addDays( key[1], -1 ) ) ) )
+                    values[-1] = '' if prep24 is None else str( prep24 )
+                    line = f"{sep.join( values )}\n"
+                fOut.write( line )
+        os.replace( filepathTemp, filepath )
+
 
 class InmetCsv():
     HEADERSTATION = (
@@ -29,83 +177,545 @@ class InmetCsv():
         'umid_max_p', 'umid_min_p', 'umid_p',
         'vent_dir_g', 'vent_max_ms', 'vent_vel_ms'
     )
+    TYPESSTATION = (
+        'TEXT', 'INTEGER',
+        'TEXT', 'TEXT',
+        'TEXT', 'TEXT',
+        'REAL', 'REAL', 'REAL',
+        'DATE'
+    )
+    TYPESTABLE = ( 'TEXT', 'TEXT', 'DATE', 'TEXT' ) + ( 'REAL', ) * ( len( HEADERTABLE ) - 4 )
     SEP_CSV = ';'
-    def __init__(self, csv_station, csv_table):
-        self.csv_station = open( csv_station, mode='w' )
-        header = f"{self.SEP_CSV.join( self.HEADERSTATION )}\n"
-        self.csv_station.write( header )
-
-        self.csv_table = open( csv_table, mode='w' )
-        header = f"{self.SEP_CSV.join( self.HEADERTABLE )}\n"
-        self.csv_table.write( header )
+    CHUNK_SIZE = 2**20 # Bytes(about) of lines read by time
+    def __init__(self, csv_station, csv_table=None, sources=None, csv_daily=None):
+        """
+        Args:
+            csv_table: None for sharded table(one CSV by source, see convert)
+            sources: None for new CSVs, else names of sources removed of existing CSVs(the rows are appended)
+            csv_daily: CSV of InmetDaily(None for without)
+        """
+        self.filepath_daily, self.csv_daily = csv_daily, None
+        self.boundaries = set() # ( code_wmo, date ) for update of prep_mm_24(close)
+        if sources is None:
+            self.csv_station = self.openCsv( csv_station, self.HEADERSTATION )
+            self.csv_table = None if csv_table is None else self.openCsv( csv_table, self.HEADERTABLE )
+            if not csv_daily is None:
+                self.csv_daily = self.openCsv( csv_daily, InmetDaily.HEADER )
+            return
+        self.csv_station = self.appendCsv( csv_station, sources )
+        self.csv_table = None if csv_table is None else self.appendCsv( csv_table, sources )
+        if not csv_daily is None:
+            lasts = {} # ( source, code_wmo ): last date of removed rows
+            def removed(line):
+                values = line.split( self.SEP_CSV, 3 )
+                key = ( values[0], values[1] )
+                lasts[ key ] = max( lasts.get( key, values[2] ), values[2] )
+            self.csv_daily = self.appendCsv( csv_daily, sources, removed )
+            self.boundaries.update( ( code_wmo, InmetDaily.addDays( date, 1 ) ) for ( _, code_wmo ), date in lasts.items() )
 
     def __del__(self):
-        self.csv_station.close()
-        self.csv_table.close()
+        self.close()
 
-    def addRows(self, pathfile):
-        srcName = getNameCsv( pathfile )
-        srcYear = srcName.split('_')[-1].split('-')[-1]
-        # CSV - number = D,D
+    @classmethod
+    def openCsv(cls, filepath, header):
+        f = open( filepath, mode='w', errors="surrogateescape" )
+        f.write( f"{cls.SEP_CSV.join( header )}\n" )
+        return f
+
+    @classmethod
+    def appendCsv(cls, filepath, sources, removed=None):
+        """
+        Remove the rows of sources(first column) and open for append
+        Args:
+            removed: function called with each removed line(None for without)
+        """
+        if sources:
+            prefixes = tuple( f"{s}{cls.SEP_CSV}" for s in sources )
+            filepathTemp = f"{filepath}.tmp"
+            with open( filepath, mode='r', errors="surrogateescape" ) as fIn, open( filepathTemp, mode='w', errors="surrogateescape" ) as fOut:
+                fOut.write( fIn.readline() ) # Header
+                for line in fIn:
+                    if not line.startswith( prefixes ):
+                        fOut.write( line )
+                    elif not removed is None:
+                        removed( line )
+            os.replace( filepathTemp, filepath )
+        return open( filepath, mode='a', errors="surrogateescape" )
+
+    def flush(self):
+        for f in ( self.csv_station, self.csv_table, self.csv_daily ):
+            if not f is None:
+                f.flush()
+
+    def close(self):
+        for f in ( self.csv_station, self.csv_table, self.csv_daily ):
+            if not f is None:
+                f.close()
+        self.csv_station, self.csv_table, self.csv_daily = None, None, None
+        if self.boundaries:
+            InmetDaily.resolveCsv( self.filepath_daily, self.boundaries )
+            self.boundaries = set()
+
+    @classmethod
+    def readStation(cls, f, srcName, srcYear):
+        """
+        Read the head of station(and the line of header of table)
+        Return: values of station(HEADERSTATION)
+        """
+        rows = len( cls.HEADERSTATION ) - 2
+        f_value = lambda l: l.strip().split( cls.SEP_CSV )[1].replace(',', '.')
+        values = [ f_value( f.readline() ) for _ in range( rows ) ]
+        f.readline() # Header of table
+        return [ srcName, srcYear ] + values
+
+    @classmethod
+    def readTable(cls, f, srcName, code_wmo, daily=None):
+        """
+        Read the rows of table by chunks
+        Args:
+            daily: InmetDaily for add the precipitation of rows(None for without)
+        Return: Iterator of ( lines(with '\n'), total of rows )
+        """
+        sep = cls.SEP_CSV
+        columns = len( cls.HEADERTABLE ) - 2
+        prefix = f"{srcName}{sep}{code_wmo}{sep}"
+        sepLine = f"\n{prefix}"
+        while True:
+            lines = f.readlines( cls.CHUNK_SIZE )
+            if not lines:
+                break
+            # CSV - number = D,D
+            lines = ''.join( lines ).replace(',', '.').splitlines()
+            values = [ l.strip().split( sep, columns )[ :columns ] for l in lines if l.strip() ]
+            if not values:
+                continue
+            if not daily is None:
+                for v in values:
+                    daily.add( v[0], v[1], getReal( v[2] ) if len( v ) > 2 else None )
+            yield f"{prefix}{sepLine.join( sep.join( v ) for v in values )}\n", len( values )
+
+    @classmethod
+    def readRows(cls, f, srcName, code_wmo, daily=None):
+        """
+        Read the rows of table by chunks, with values of TYPESTABLE
+        Args:
+            daily: InmetDaily for add the precipitation of rows(None for without)
+        Return: Iterator of list of rows
+        """
+        sep = cls.SEP_CSV
+        columns = len( cls.HEADERTABLE ) - 2
+        nulls = [ None ] * ( columns - 2 )
+        while True:
+            lines = f.readlines( cls.CHUNK_SIZE )
+            if not lines:
+                break
+            rows = []
+            for l in ''.join( lines ).replace(',', '.').splitlines():
+                values = l.strip().split( sep, columns )[ :columns ]
+                if len( values ) < 2:
+                    continue
+                reals = ( [ getReal( v ) for v in values[ 2: ] ] + nulls )[ :columns - 2 ]
+                rows.append( ( srcName, code_wmo, getDate( values[0] ), getHour( values[1] ), *reals ) )
+                if not daily is None:
+                    daily.add( rows[-1][2], rows[-1][3], reals[0] )
+            if rows:
+                yield rows
+
+    @classmethod
+    def typedStation(cls, values):
+        """
+        Return: values of station with TYPESSTATION
+        """
+        f_type = { 'TEXT': str, 'REAL': getReal, 'DATE': getDate, 'INTEGER': lambda v: int( v ) if v.isdigit() else None }
+        return tuple( f_type[ t ]( v ) for t, v in zip( cls.TYPESSTATION, values ) )
+
+    @classmethod
+    def convert(cls, pathfile, filepathTable, header=False):
+        """
+        Convert one source CSV(bounded memory)
+        Args:
+            filepathTable: CSV of rows of table
+            header: write the header in filepathTable(sharded table)
+        Return: { 'station': values of station, 'rows', 'daily': rows of InmetDaily }
+        """
+        srcName, srcYear = getSource( pathfile )
+        total = 0
+        with open( pathfile, mode='r', errors="surrogateescape") as f:
+            values = cls.readStation( f, srcName, srcYear )
+            code_wmo = values[ cls.HEADERSTATION.index('code_wmo') ]
+            daily = InmetDaily()
+            fTable = cls.openCsv( filepathTable, cls.HEADERTABLE ) if header else open( filepathTable, mode='w', errors="surrogateescape" )
+            with fTable:
+                for lines, rows in cls.readTable( f, srcName, code_wmo, daily ):
+                    fTable.write( lines )
+                    total += rows
+        return { 'station': values, 'rows': total, 'daily': daily.getRows( srcName, code_wmo ) }
+
+    @classmethod
+    def convertSqlite(cls, pathfile, filepathDb):
+        """
+        Convert one source CSV(bounded memory) to table 'stations_table' of a new SQLite
+        Return: { 'station': values of station, 'rows', 'daily': rows of InmetDaily }
+        """
+        srcName, srcYear = getSource( pathfile )
+        total = 0
         with open( pathfile, mode='r', errors="surrogateescape") as f:
-            lines = f.readlines()
-        #
-        # Station
-        rows = len( self.HEADERSTATION ) - 2
-        f_value = lambda l: l.strip().split(self.SEP_CSV)[1].replace(',', '.')
-        values = [ f_value( l ) for l in lines[ :rows ] ]
-        values = [ srcName, srcYear ] + values
-        w_line = f"{self.SEP_CSV.join( values )}\n"
-        self.csv_station.write( w_line )
-        code_wmo = values[ self.HEADERSTATION.index('code_wmo') ]
-        # Table
-        del lines[: rows + 1]
-        columns = len( self.HEADERTABLE ) - 2
-        w_lines = []
-        for line in lines:
-            values = [ v.replace(',', '.') for v in line.strip().split( self.SEP_CSV ) ]
-            del values[ columns: ]
-            values = [ srcName, code_wmo ] + values
-            w_line = f"{self.SEP_CSV.join( values )}"
-            w_lines.append( w_line )
-        self.csv_table.write( "\n".join( w_lines ) )
-        self.csv_table.write('\n')
-        del w_lines[:]
-        del values[:]
+            values = cls.readStation( f, srcName, srcYear )
+            code_wmo = values[ cls.HEADERSTATION.index('code_wmo') ]
+            daily = InmetDaily()
+            conn = InmetSqlite.connect( filepathDb, 'OFF' )
+            try:
+                InmetSqlite.createTable( conn, 'stations_table' )
+                sql = InmetSqlite.sqlInsert('stations_table')
+                with conn: # Transaction
+                    for rows in cls.readRows( f, srcName, code_wmo, daily ):
+                        conn.executemany( sql, rows )
+                        total += len( rows )
+            finally:
+                conn.close()
+        return { 'station': values, 'rows': total, 'daily': daily.getRows( srcName, code_wmo ) }
+
+    def addStation(self, values):
+        self.csv_station.write( f"{self.SEP_CSV.join( values )}\n" )
+
+    def addDaily(self, rows):
+        if self.csv_daily is None:
+            return
+        f_value = lambda v: '' if v is None else str( v )
+        self.csv_daily.writelines( f"{self.SEP_CSV.join( map( f_value, row ) )}\n" for row in rows )
+        self.boundaries.update( InmetDaily.getBoundaries( rows ) )
+
+    def addTable(self, filepath):
+        """
+        Append the rows of filepath(without header) and remove it
+        """
+        with open( filepath, mode='r', errors="surrogateescape" ) as f:
+            shutil.copyfileobj( f, self.csv_table )
+        os.remove( filepath )
+
+    def addRows(self, pathfile):
+        with tempfile.NamedTemporaryFile( suffix='.csv', delete=False ) as f:
+            filepathTable = f.name
+        r = self.convert( pathfile, filepathTable )
+        self.addStation( r['station'] )
+        self.addTable( filepathTable )
+        self.addDaily( r['daily'] )
+
+
+class InmetSqlite():
+    """
+    Tables 'stations', 'stations_table' and 'stations_daily' with types
+    (see InmetCsv.TYPESSTATION, TYPESTABLE and InmetDaily.TYPES),
+    the indexes are created after load(close)
+    """
+    TABLES = {
+        'stations': ( InmetCsv.HEADERSTATION, InmetCsv.TYPESSTATION ),
+        'stations_table': ( InmetCsv.HEADERTABLE, InmetCsv.TYPESTABLE ),
+        'stations_daily': ( InmetDaily.HEADER, InmetDaily.TYPES )
+    }
+    INDEXES = {
+        'stations': ( 'code_wmo', ),
+        'stations_table': ( 'code_wmo', 'data' ),
+        'stations_daily': ( 'code_wmo', 'data' )
+    }
+    def __init__(self, filepath, sources=None):
+        """
+        Args:
+            sources: None for new tables, else names of sources removed of existing tables(the rows are appended)
+        """
+        self.conn = self.connect( filepath )
+        self.boundaries = set() # ( code_wmo, date ) for update of prep_mm_24(close)
+        with self.conn:
+            for table in self.TABLES:
+                if sources is None:
+                    self.conn.execute( f"DROP TABLE IF EXISTS {table}" )
+                self.createTable( self.conn, table )
+            for source in sources or []:
+                sql = 'SELECT code_wmo FROM stations WHERE source = ?'
+                for code_wmo, in self.conn.execute( sql, ( source, ) ).fetchall():
+                    # Index(code_wmo, data)
+                    sql = 'SELECT MAX( data ) FROM stations_daily WHERE code_wmo = ? AND source = ?'
+                    date, = self.conn.execute( sql, ( code_wmo, source ) ).fetchone()
+                    if not date is None:
+                        self.boundaries.add( ( code_wmo, InmetDaily.addDays( date, 1 ) ) )
+                    for table in ( 'stations_table', 'stations_daily' ):
+                        sql = f"DELETE FROM {table} WHERE code_wmo = ? AND source = ?"
+                        self.conn.execute( sql, ( code_wmo, source ) )
+                self.conn.execute( 'DELETE FROM stations WHERE source = ?', ( source, ) )
+        self.sqlStation = self.sqlInsert('stations')
+        self.sqlDaily = self.sqlInsert('stations_daily')
+
+    def __del__(self):
+        self.close()
+
+    @staticmethod
+    def connect(filepath, journal='MEMORY'):
+        """
+        Connection for bulk load(not safe for crash of system)
+        """
+        conn = sqlite3.connect( filepath )
+        for pragma in ( f"journal_mode={journal}", 'synchronous=OFF', 'temp_store=MEMORY', 'cache_size=-262144' ):
+            conn.execute( f"PRAGMA {pragma}" )
+        return conn
+
+    @classmethod
+    def createTable(cls, conn, table):
+        columns = ', '.join( f"{c} {t}" for c, t in zip( *cls.TABLES[ table ] ) )
+        conn.execute( f"CREATE TABLE IF NOT EXISTS {table} ( {columns} )" )
+
+    @classmethod
+    def sqlInsert(cls, table):
+        values = ', '.join( '?' * len( cls.TABLES[ table ][0] ) )
+        return f"INSERT INTO {table} VALUES ( {values} )"
+
+    def addStation(self, values):
+        with self.conn:
+            self.conn.execute( self.sqlStation, InmetCsv.typedStation( values ) )
+
+    def addDaily(self, rows):
+        with self.conn:
+            self.conn.executemany( self.sqlDaily, rows )
+        self.boundaries.update( InmetDaily.getBoundaries( rows ) )
+
+    def addTable(self, filepath):
+        """
+        Insert the rows of 'stations_table' of filepath(SQLite) and remove it
+        """
+        self.conn.execute( 'ATTACH DATABASE ? AS part', ( filepath, ) )
+        with self.conn:
+            self.conn.execute( 'INSERT INTO stations_table SELECT * FROM part.stations_table' )
+        self.conn.execute( 'DETACH DATABASE part' )
+        os.remove( filepath )
+
+    def flush(self):
+        pass # Committed by source
+
+    def close(self):
+        if self.conn is None:
+            return
+        with self.conn:
+            for table, columns in self.INDEXES.items():
+                name = f"idx_{table}_{'_'.join( columns )}"
+                self.conn.execute( f"CREATE INDEX IF NOT EXISTS {name} ON {table} ( {', '.join( columns )} )" )
+            # prep_mm_24 with previous date of other source
+            complete = lambda t: f"{t}.hours - {t}.nulls = {InmetDaily.HOURS}"
+            sql = f"""UPDATE stations_daily SET prep_mm_24 = (
+                SELECT ROUND( stations_daily.prep_mm_12 + p.prep_mm_13, 2 )
+                FROM stations_daily p
+                WHERE p.code_wmo = stations_daily.code_wmo AND p.data = DATE( stations_daily.data, '-1 day' )
+                AND {complete('p')} AND {complete('stations_daily')}
+            ) WHERE code_wmo = ? AND data = ?"""
+            self.conn.executemany( sql, self.boundaries )
+        self.conn.close()
+        self.conn = None
+
+
+
+class InmetManifest():
+    """
+    Sources of outputs(path, size, mtime and hash of content), for add only the new or changed sources
+    """
+    HEADER = ( 'path', 'size', 'mtime', 'hash' )
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.items = {} # name of source: { 'path', 'size', 'mtime', 'hash' }
+        if os.path.exists( filepath ):
+            with open( filepath, newline='' ) as f:
+                for row in csv.DictReader( f, delimiter=InmetCsv.SEP_CSV ):
+                    row['size'], row['mtime'] = int( row['size'] ), int( row['mtime'] )
+                    self.items[ getNameCsv( row['path'] ) ] = row
+
+    @staticmethod
+    def getHash(pathfile):
+        h = hashlib.sha1()
+        with open( pathfile, mode='rb' ) as f:
+            for data in iter( lambda: f.read( InmetCsv.CHUNK_SIZE ), b'' ):
+                h.update( data )
+        return h.hexdigest()
+
+    @classmethod
+    def getInfo(cls, pathfile, isHash=True):
+        st = os.stat( pathfile )
+        info = { 'path': os.path.basename( pathfile ), 'size': st.st_size, 'mtime': st.st_mtime_ns }
+        info['hash'] = cls.getHash( pathfile ) if isHash else None
+        return info
+
+    def getChanges(self, pathfiles):
+        """
+        Return: ( pathfiles of new or changed sources, names of changed or removed sources )
+        """
+        news, olds, names = [], [], set()
+        for pathfile in pathfiles:
+            name = getNameCsv( pathfile )
+            names.add( name )
+            item = self.items.get( name )
+            if item is None:
+                news.append( pathfile )
+                continue
+            info = self.getInfo( pathfile, False )
+            if ( info['size'], info['mtime'] ) == ( item['size'], item['mtime'] ):
+                continue
+            if info['size'] == item['size']:
+                info['hash'] = self.getHash( pathfile )
+                if info['hash'] == item['hash']: # Only touched
+                    self.items[ name ] = info
+                    continue
+            news.append( pathfile )
+            olds.append( name )
+        olds.extend( name for name in self.items if not name in names )
+        return news, olds
+
+    def set(self, info):
+        self.items[ getNameCsv( info['path'] ) ] = info
+
+    def remove(self, names):
+        for name in names:
+            self.items.pop( name, None )
+
+    def save(self):
+        filepathTemp = f"{self.filepath}.tmp"
+        with open( filepathTemp, mode='w', newline='' ) as f:
+            writer = csv.writer( f, delimiter=InmetCsv.SEP_CSV )
+            writer.writerow( self.HEADER )
+            for name in sorted( self.items ):
+                writer.writerow( self.items[ name ][ k ] for k in self.HEADER )
+        os.replace( filepathTemp, self.filepath )
+
+def convertCsv(args):
+    """
+    Worker of pool
+    Args:
+        args: ( pathfile, filepathTable, header )
+    """
+    r = InmetCsv.convert( *args )
+    r['info'] = InmetManifest.getInfo( args[0] )
+    return r
+
+def convertSqlite(args):
+    """
+    Worker of pool
+    Args:
+        args: ( pathfile, filepathDb )
+    """
+    r = InmetCsv.convertSqlite( *args )
+    r['info'] = InmetManifest.getInfo( args[0] )
+    return r
 
 def printStatus(message, newLine=False):
     ch = '\n' if newLine else ''
     sys.stdout.write( "\r{}".format( message.ljust(100) + ch ) )
     sys.stdout.flush()
 
-def run(dir_csv):
+def run(dir_csv, processes=1, sharded=False, filepath_sqlite=None, incremental=False):
+    """
+    Tables of stations and aggregates of precipitation by station and date('stations_daily', see InmetDaily)
+    Args:
+        processes: total of processes for parse the sources(one source by time in each process)
+        sharded: table in one CSV by source(directory 'stations_table'), else ordered in one CSV
+        filepath_sqlite: tables with types in SQLite(replace the tables), instead of CSVs
+        incremental: only the new or changed sources(manifest of previous run),
+                     the rows of changed or removed sources are removed and the new rows appended
+    """
     ext_csv = 'CSV'
     csv_station = os.path.join( dir_csv, 'stations.csv' )
-    csv_table = os.path.join( dir_csv,'stations_table.csv' )
-    ic = InmetCsv( csv_station, csv_table )
-    l_csv = [ f for f in glob.glob(f"{dir_csv}{os.path.sep}*.{ext_csv}") ]
-    count, total = 1, len( l_csv)
-    for csv in l_csv:
-        name = getNameCsv( csv )
-        msg = f"{count}/{total}: {name}"
-        printStatus( msg )
-        count += 1
-        ic.addRows( csv )
-    del ic
+    csv_table = os.path.join( dir_csv, 'stations_table.csv' )
+    csv_daily = os.path.join( dir_csv, 'stations_daily.csv' )
+    dir_sharded = os.path.join( dir_csv, 'stations_table' )
+    l_csv = sorted( glob.glob(f"{dir_csv}{os.path.sep}*.{ext_csv}") )
+    if not filepath_sqlite is None:
+        sharded = False
+        filepath_manifest = f"{os.path.splitext( filepath_sqlite )[0]}_manifest.csv"
+        outputs = ( filepath_sqlite, )
+    elif sharded:
+        filepath_manifest = os.path.join( dir_csv, 'stations_table_sharded_manifest.csv' )
+        outputs = ( csv_station, dir_sharded, csv_daily )
+    else:
+        filepath_manifest = os.path.join( dir_csv, 'stations_table_manifest.csv' )
+        outputs = ( csv_station, csv_table, csv_daily )
+    outputs += ( filepath_manifest, )
+    incremental = incremental and all( os.path.exists( f ) for f in outputs )
+    if incremental:
+        manifest = InmetManifest( filepath_manifest )
+        l_csv, sources = manifest.getChanges( l_csv )
+        manifest.remove( sources )
+        # Rows of new sources appended by interrupted run(before save of manifest) are removed
+        sources = sorted( set( sources ).union( map( getNameCsv, l_csv ) ) )
+    else:
+        # Without manifest until the end of run
+        if os.path.exists( filepath_manifest ):
+            os.remove( filepath_manifest )
+        manifest = InmetManifest( filepath_manifest )
+        sources = None
+    worker = convertCsv
+    if not filepath_sqlite is None:
+        dir_table = tempfile.mkdtemp( prefix='stations_table_', dir=dir_csv )
+        ic = InmetSqlite( filepath_sqlite, sources )
+        worker = convertSqlite
+        tasks = [ ( f, os.path.join( dir_table, f"{idx}.db" ) ) for idx, f in enumerate( l_csv ) ]
+    elif sharded:
+        dir_table = dir_sharded
+        os.makedirs( dir_table, exist_ok=True )
+        for name in sources or []:
+            filepath = os.path.join( dir_table, f"{name}.csv" )
+            if os.path.exists( filepath ):
+                os.remove( filepath )
+        ic = InmetCsv( csv_station, sources=sources, csv_daily=csv_daily )
+        tasks = [ ( f, os.path.join( dir_table, f"{getNameCsv( f )}.csv" ), True ) for f in l_csv ]
+    else:
+        dir_table = tempfile.mkdtemp( prefix='stations_table_', dir=dir_csv )
+        ic = InmetCsv( csv_station, csv_table, sources, csv_daily )
+        tasks = [ ( f, os.path.join( dir_table, f"{idx}.csv" ), False ) for idx, f in enumerate( l_csv ) ]
+    if incremental:
+        manifest.save() # Removed sources
+    pool = Pool( processes=processes ) if processes > 1 and len( tasks ) > 1 else None
+    mapTasks = map if pool is None else pool.imap
+    count, total, rows = 1, len( l_csv ), 0
+    try:
+        # Order of sources(imap), the table of each source is in one file
+        for task, r in zip( tasks, mapTasks( worker, tasks ) ):
+            name = getNameCsv( task[0] )
+            msg = f"{count}/{total}: {name}"
+            printStatus( msg )
+            count += 1
+            rows += r['rows']
+            ic.addStation( r['station'] )
+            ic.addDaily( r['daily'] )
+            if not sharded:
+                ic.addTable( task[1] )
+            manifest.set( r['info'] )
+            if incremental: # Few sources
+                ic.flush()
+                manifest.save()
+    finally:
+        if not pool is None:
+            pool.terminate()
+        ic.close()
+        if not sharded:
+            shutil.rmtree( dir_table, ignore_errors=True )
+    manifest.save()
+    msg = f"Sources: {total} | Rows of table: {rows}"
+    if incremental:
+        msg = f"{msg} | Removed sources: {len( sources ) - len( set( sources ).intersection( map( getNameCsv, l_csv ) ) )}"
+    printStatus( msg, True )
     return 0
 
 def main():
     msg = "Create CVS's tables from Inmet CSVs Directory."
     parser = argparse.ArgumentParser(description=msg)
     parser.add_argument('dir_csv', type=str, help='CSVs Directory')
+    parser.add_argument('-p', '--processes', type=int, default=os.cpu_count(), help='Total of processes for parse the CSVs(default: total of CPUs)')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--sharded', action='store_true', help="Table in one CSV by source, in directory 'stations_table'(default: one CSV, ordered by source)")
+    group.add_argument('--sqlite', type=str, default=None, help="Filepath of SQLite for tables 'stations' and 'stations_table' with types(instead of CSVs)")
+    parser.add_argument('-i', '--incremental', action='store_true', help='Only new or changed CSVs, by manifest of previous run(default: all CSVs)')
 
     args = parser.parse_args()
-    
+
     if not os.path.isdir( args.dir_csv ):
         msg = f"'{args.dir_csv}' is missing"
         printStatus( msg, True )
         return 1
-    return run( args.dir_csv )
+    return run( args.dir_csv, max( args.processes, 1 ), args.sharded, args.sqlite, args.incremental )
 
 if __name__ == '__main__':
     sys.exit( main() )
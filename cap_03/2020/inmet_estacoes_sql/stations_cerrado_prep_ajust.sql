@@ -1,3 +1,7 @@
+-- Alternative: inmet-csv2tables.py ... --sqlite <project.db>
+--   stations_table with types(data: 'YYYY-MM-DD', hora: 'HH:MM', prep_mm: REAL or NULL), without CAST:
+--   SELECT code_wmo, "data" || ' ' || hora AS v_datetime, prep_mm
+--   FROM stations_cerrado_prep WHERE NOT prep_mm IS NULL
 CREATE TABLE stations_cerrado_prep_ajust
 AS
 SELECT 
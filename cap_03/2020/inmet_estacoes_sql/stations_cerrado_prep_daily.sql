@@ -1,3 +1,10 @@
+-- Alternative: inmet-csv2tables.py ... --sqlite <project.db>
+--   stations_daily.prep_mm_24 = total_prep_mm_12 + total_prep_mm_13 of previous day(24 hours in both days),
+--   without temp_1, temp_2 and stations_cerrado_prep_total_half:
+--   CREATE TABLE stations_cerrado_prep_daily AS
+--   SELECT d.code_wmo, d.data AS v_date, d.prep_mm_24 AS prep_mm
+--   FROM stations_daily d INNER JOIN stations_cerrado sc ON d.code_wmo = sc.code_wmo
+--   WHERE d.data BETWEEN '2016-12-21' AND '2020-03-20' AND NOT d.prep_mm_24 IS NULL;
 --- Create table stations_cerrado_prep_daily (2016-12-21 - 2020-03-20)
 ---- 1) stations_cerrado_prep_ajust (2016-12-20 - 2020-03-20)
 CREATE TABLE temp_1 AS
@@ -1,3 +1,6 @@
+-- Alternative: daily_precipitation_gpm_http.py ... --sqlite <project.db>
+--   inserts directly in stations_cerrado_gpm(without sc_temp tables)
+--   with --zones inserts the mean of zones in zones_cerrado_gpm( zone, date, mean_mm )
 -- Create
 CREATE TABLE stations_cerrado_gpm (
     code_wmo TEXT, date TEXT, prep_mm REAL
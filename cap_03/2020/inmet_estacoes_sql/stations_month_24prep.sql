@@ -1,3 +1,8 @@
+-- Alternative: inmet-csv2tables.py ... --sqlite <project.db>
+--   stations_daily(aggregates by code_wmo and data), without stations_cerrado_prep_ajust:
+--   SELECT d.code_wmo, d.data AS v_date
+--   FROM stations_daily d INNER JOIN stations_cerrado sc ON d.code_wmo = sc.code_wmo
+--   WHERE d.hours - d.nulls = 24
 CREATE TABLE stations_month_24prep
 AS
 SELECT code_wmo, date(v_datetime) AS v_date
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+Name                 : Daily matrix
+Description          : Matrix station x date(float32, NaN for missing) of daily values
+                       - Save: NPZ(numpy), Parquet(pyarrow) and SQLite table
+Date                 : October, 2026
+copyright            : (C) 2026 by Luiz Motta
+email                : motta.luiz@gmail.com
+
+Example:
+    from mod_py.dailymatrix import DailyMatrix
+    dm = DailyMatrix( ids, dateIni, dateEnd )
+    dm.set( '2020-01-01', values ) # values of ids
+    dm.saveNpz('daily.npz')
+    dm.saveSqlite( 'project.db', 'stations_cerrado_gpm' )
+
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+__author__ = 'Luiz Motta'
+__date__ = '2026-10-18'
+__copyright__ = '(C) 2026, Luiz Motta'
+__revision__ = '$Format:%H$'
+
+
+import csv, sqlite3
+from datetime import timedelta
+
+import numpy as np
+
+
+class DailyMatrix():
+    FORMATS = ( 'npz', 'parquet' )
+    def __init__(self, ids, dateIni=None, dateEnd=None, dates=None, values=None):
+        """
+        Args:
+            ids: identifiers of stations(rows)
+            dateIni, dateEnd: range of dates(columns) or dates(labels YYYY-mm-DD)
+            values: array (ids, dates), default NaN
+        """
+        self.ids = [ str( v ) for v in ids ]
+        if dates is None:
+            days = ( dateEnd - dateIni ).days + 1
+            dates = [ ( dateIni + timedelta( days=d ) ).strftime('%Y-%m-%d') for d in range( days ) ]
+        self.dates = [ str( v ) for v in dates ]
+        self.idxDate = { d: idx for idx, d in enumerate( self.dates ) }
+        if values is None:
+            values = np.full( ( len( self.ids ), len( self.dates ) ), np.nan, dtype=np.float32 )
+        self.values = values
+
+    def set(self, labelDate, values):
+        self.values[ :, self.idxDate[ labelDate ] ] = values
+
+    def loadCsv(self, filepath, sep=';'):
+        """
+        Values of CSV(id, date, value, ...), used for resume
+        """
+        idxId = { k: idx for idx, k in enumerate( self.ids ) }
+        with open( filepath ) as csvfile:
+            rows = csv.reader( csvfile, delimiter=sep )
+            next( rows, None )
+            for row in rows:
+                if len( row ) >= 3 and row[0] in idxId and row[1] in self.idxDate:
+                    self.values[ idxId[ row[0] ], self.idxDate[ row[1] ] ] = float( row[2] )
+
+    @staticmethod
+    def loadNpz(filepath):
+        with np.load( filepath ) as data:
+            return DailyMatrix( data['ids'].tolist(), dates=data['dates'].tolist(), values=data['values'] )
+
+    @staticmethod
+    def concat(matrices):
+        """
+        Concatenate by dates(same ids)
+        """
+        dates = [ d for m in matrices for d in m.dates ]
+        values = np.concatenate( [ m.values for m in matrices ], axis=1 )
+        return DailyMatrix( matrices[0].ids, dates=dates, values=values )
+
+    def saveNpz(self, filepath):
+        np.savez_compressed( filepath, ids=np.array( self.ids ), dates=np.array( self.dates ), values=self.values )
+
+    def saveParquet(self, filepath):
+        """
+        Columns: id and one column(float32) by date
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            return { 'isOk': False, 'message': 'Missing pyarrow for Parquet' }
+        columns = { 'id': pa.array( self.ids ) }
+        for idx, d in enumerate( self.dates ):
+            columns[ d ] = pa.array( self.values[:, idx ] )
+        pq.write_table( pa.table( columns ), filepath, compression='zstd' )
+        return { 'isOk': True }
+
+    def save(self, filepath, format):
+        """
+        Args:
+            format: 'npz' or 'parquet'
+        Return: { 'isOk', 'message' }
+        """
+        if format == 'npz':
+            self.saveNpz( filepath )
+            return { 'isOk': True }
+        if format == 'parquet':
+            return self.saveParquet( filepath )
+        return { 'isOk': False, 'message': f"Format '{format}' is invalid" }
+
+    def saveSqlite(self, filepath, table, columns=( 'code_wmo', 'date', 'prep_mm' )):
+        """
+        Insert the values(not NaN) in one transaction, replacing the previous values of ids and range of dates
+        Args:
+            columns: names of columns of id(TEXT), date(TEXT) and value(REAL)
+        Return: total of rows
+        """
+        c_id, c_date, c_value = columns
+        conn = sqlite3.connect( filepath )
+        try:
+            with conn: # Transaction
+                conn.execute( f"CREATE TABLE IF NOT EXISTS {table} ( {c_id} TEXT, {c_date} TEXT, {c_value} REAL )" )
+                sql = f"DELETE FROM {table} WHERE {c_id} = ? AND {c_date} BETWEEN ? AND ?"
+                conn.executemany( sql, ( ( k, self.dates[0], self.dates[-1] ) for k in self.ids ) )
+                rows, cols = np.nonzero( ~np.isnan( self.values ) )
+                # Shortest representation of float32(ex.: 4.7 and not 4.699999809)
+                values = self.values[ rows, cols ].astype( str ).astype( np.float64 ).tolist()
+                items = zip( ( self.ids[ r ] for r in rows.tolist() ), ( self.dates[ c ] for c in cols.tolist() ), values )
+                conn.executemany( f"INSERT INTO {table} VALUES ( ?, ?, ? )", items )
+        finally:
+            conn.close()
+        return len( values )
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+Name                 : GPM mock server
+Description          : Local HTTP(S) server with synthetic IMERG images(GeoTiff)
+                       for tests and benchmarks without NASA server
+                       - Layout: /imerg/gis/YYYY/mm/<name of image>.tif
+                       - Basic authentication(email as user and password)
+                       - Latency(seconds by request) and failures(status 503)
+                       - Images: 3600 x 1800(0.1 degree) Int16(0.1 mm/hr),
+                         a few random images selected by name(deterministic)
+Date                 : October, 2026
+copyright            : (C) 2026 by Luiz Motta
+email                : motta.luiz@gmail.com
+
+Example:
+    from mod_py.gpmmockserver import GpmMockServer
+    server = GpmMockServer( email, latency=0.05, failure=0.01 )
+    url_root = server.start() # http://127.0.0.1:<port>
+    ...
+    server.stop()
+
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+__author__ = 'Luiz Motta'
+__date__ = '2026-10-18'
+__copyright__ = '(C) 2026, Luiz Motta'
+__revision__ = '$Format:%H$'
+
+
+import re, ssl, time, base64, random, zlib, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from osgeo import gdal, osr
+gdal.UseExceptions()
+
+
+class GpmMockServer():
+    PATTERN = re.compile( r"^/imerg/gis/(\d{4})/(\d{2})/3B-HHR-L\.MS\.MRG\.3IMERG\.(\d{4})(\d{2})\d{2}-S\d{6}-E\d{6}\.\d{4}\.V\d{2}B\.(30min|3hr|1day)\.tif$" )
+    TRANSFORM = ( -180.0, 0.1, 0.0, 90.0, 0.0, -0.1 )
+    TIFF_OPTIONS = [ 'TILED=YES', 'COMPRESS=DEFLATE' ]
+    def __init__(self, email, host='127.0.0.1', port=0, latency=0.0, failure=0.0, certfile=None, keyfile=None, images=4, seed=0):
+        """
+        Args:
+            port: 0 for a free port
+            latency: seconds before each response
+            failure: probability(0 to 1) of response with status 503
+            certfile, keyfile: HTTPS(None for HTTP)
+            images: total of different random images
+        """
+        self.host, self.port = host, port
+        self.latency, self.failure = latency, failure
+        self.certfile, self.keyfile = certfile, keyfile
+        token = base64.b64encode( f"{email}:{email}".encode() ).decode()
+        self.authorization = f"Basic {token}"
+        self.random = random.Random( seed )
+        self.images = [ self.createImage( seed + i ) for i in range( images ) ]
+        self.lock = threading.Lock()
+        self.stats = { 'requests': 0, 'bytes': 0, 'failures': 0, 'not_found': 0, 'unauthorized': 0 }
+        self.server, self.thread = None, None
+
+    def createImage(self, seed):
+        """
+        Return: bytes of GeoTiff(0.1 mm/hr), most of pixels without rain
+        """
+        rng = np.random.default_rng( seed )
+        cols, rows = 3600, 1800
+        arry = rng.gamma( 0.5, 20.0, ( rows, cols ) )
+        arry[ rng.random( ( rows, cols ) ) < 0.8 ] = 0
+        source = f"/vsimem/gpm_mock_{seed}.tif"
+        drv = gdal.GetDriverByName('GTiff')
+        ds = drv.Create( source, cols, rows, 1, gdal.GDT_Int16, options=self.TIFF_OPTIONS )
+        ds.SetGeoTransform( self.TRANSFORM )
+        sr = osr.SpatialReference()
+        sr.ImportFromEPSG( 4326 )
+        ds.SetProjection( sr.ExportToWkt() )
+        ds.GetRasterBand(1).WriteArray( arry.astype( np.int16 ) )
+        ds = None
+        f = gdal.VSIFOpenL( source, 'rb' )
+        gdal.VSIFSeekL( f, 0, 2 )
+        size = gdal.VSIFTellL( f )
+        gdal.VSIFSeekL( f, 0, 0 )
+        data = gdal.VSIFReadL( 1, size, f )
+        gdal.VSIFCloseL( f )
+        gdal.Unlink( source )
+        return data
+
+    def addStats(self, key, value=1):
+        with self.lock:
+            self.stats[ key ] += value
+
+    def getImage(self, path):
+        """
+        Return: bytes of image or None for path(or date) invalid
+        """
+        m = self.PATTERN.match( path )
+        if m is None or not m.group(1, 2) == m.group(3, 4): # Directory YYYY/mm of day
+            return None
+        return self.images[ zlib.crc32( path.encode() ) % len( self.images ) ]
+
+    def isFailure(self):
+        with self.lock:
+            return self.random.random() < self.failure
+
+    def _createHandler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1' # Keep-alive
+
+            def log_message(self, format, *args):
+                pass
+
+            def sendStatus(self, status, body=b''):
+                self.send_response( status )
+                if status == 401:
+                    self.send_header( 'WWW-Authenticate', 'Basic realm="gpm"' )
+                self.send_header( 'Content-Length', str( len( body ) ) )
+                self.end_headers()
+                if body and not self.command == 'HEAD':
+                    self.wfile.write( body )
+
+            def response(self):
+                server.addStats('requests')
+                if server.latency:
+                    time.sleep( server.latency )
+                if not self.headers.get('Authorization') == server.authorization:
+                    server.addStats('unauthorized')
+                    return self.sendStatus( 401 )
+                if server.isFailure():
+                    server.addStats('failures')
+                    return self.sendStatus( 503 )
+                data = server.getImage( self.path )
+                if data is None:
+                    server.addStats('not_found')
+                    return self.sendStatus( 404 )
+                self.send_response( 200 )
+                self.send_header( 'Content-Type', 'image/tiff' )
+                self.send_header( 'Content-Length', str( len( data ) ) )
+                self.end_headers()
+                if self.command == 'GET':
+                    self.wfile.write( data )
+                    server.addStats( 'bytes', len( data ) )
+
+            do_GET = response
+            do_HEAD = response
+
+        return Handler
+
+    def start(self):
+        """
+        Start the server in thread
+        Return: url_root(ex.: http://127.0.0.1:8000)
+        """
+        self.server = ThreadingHTTPServer( ( self.host, self.port ), self._createHandler() )
+        self.server.daemon_threads = True
+        scheme = 'http'
+        if not self.certfile is None:
+            context = ssl.SSLContext( ssl.PROTOCOL_TLS_SERVER )
+            context.load_cert_chain( self.certfile, self.keyfile )
+            self.server.socket = context.wrap_socket( self.server.socket, server_side=True )
+            scheme = 'https'
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread( target=self.server.serve_forever, daemon=True )
+        self.thread.start()
+        return f"{scheme}://{self.host}:{self.port}"
+
+    def stop(self):
+        if self.server is None:
+            return
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.server, self.thread = None, None
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+Name                 : HTTP client
+Description          : Download files by HTTP(S) with keep-alive connections
+                       (one connection by thread and host), basic authentication,
+                       timeout and retries with backoff
+Date                 : October, 2026
+copyright            : (C) 2026 by Luiz Motta
+email                : motta.luiz@gmail.com
+
+Example:
+    from mod_py.httpclient import HttpClient
+    client = HttpClient( user, password, timeout=30, retries=3 )
+    r = client.download( url, filepath )
+    if not r['isOk']:
+        print( r['message'] )
+
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+__author__ = 'Luiz Motta'
+__date__ = '2026-10-18'
+__copyright__ = '(C) 2026, Luiz Motta'
+__revision__ = '$Format:%H$'
+
+
+import os, time, base64, socket, threading
+import http.client
+import urllib.parse
+
+
+class HttpClient():
+    STATUS_REDIRECT = ( 301, 302, 303, 307, 308 )
+    MAX_REDIRECT = 5
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, user=None, password=None, timeout=30, retries=3, backoff=1.0):
+        """
+        Args:
+            user, password: Basic authentication(None for without authentication)
+            timeout: seconds for connection and read
+            retries: total of retries for errors of connection or status 5XX
+            backoff: seconds of first retry, doubled for each retry
+        """
+        self.timeout, self.retries, self.backoff = timeout, retries, backoff
+        self.authorization = None
+        if not user is None:
+            token = base64.b64encode( f"{user}:{password}".encode() ).decode()
+            self.authorization = f"Basic {token}"
+        self.local = threading.local() # Connections by thread
+
+    def _getConnection(self, scheme, netloc):
+        if not hasattr( self.local, 'connections' ):
+            self.local.connections = {}
+        key = ( scheme, netloc )
+        conn = self.local.connections.get( key )
+        if conn is None:
+            f_conn = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+            conn = f_conn( netloc, timeout=self.timeout )
+            self.local.connections[ key ] = conn
+        return conn
+
+    def _closeConnection(self, scheme, netloc):
+        conn = self.local.connections.pop( ( scheme, netloc ), None )
+        if not conn is None:
+            conn.close()
+
+    def close(self):
+        """
+        Close connections of the current thread
+        """
+        for conn in getattr( self.local, 'connections', {} ).values():
+            conn.close()
+        self.local.connections = {}
+
+    def _request(self, method, url, f_body):
+        """
+        One request(following redirects) over keep-alive connection
+        The authentication is sent only for the scheme and host of url,
+        redirects from HTTPS to HTTP are refused.
+        Keep-alive connection closed by server(idle) is reconnected and the request sent again, without retry
+        Args:
+            f_body: function(response) for response with status 200
+        Return: { 'status', 'reason', 'result' }
+        """
+        origin = urllib.parse.urlsplit( url )
+        for _i in range( self.MAX_REDIRECT + 1 ):
+            parts = urllib.parse.urlsplit( url )
+            if origin.scheme == 'https' and not parts.scheme == 'https':
+                return { 'status': response.status, 'reason': f"Redirect to insecure url '{url}'", 'result': None }
+            path = parts.path + ( f"?{parts.query}" if parts.query else '' )
+            headers = { 'Connection': 'keep-alive' }
+            if self.authorization and ( parts.scheme, parts.netloc ) == ( origin.scheme, origin.netloc ):
+                headers['Authorization'] = self.authorization
+            conn = self._getConnection( parts.scheme, parts.netloc )
+            isReused = not conn.sock is None
+            try:
+                try:
+                    conn.request( method, path, headers=headers )
+                    response = conn.getresponse()
+                except ( http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError ):
+                    if not isReused: # Failure of new connection
+                        raise
+                    # Closed before any byte of response
+                    self._closeConnection( parts.scheme, parts.netloc )
+                    conn = self._getConnection( parts.scheme, parts.netloc )
+                    conn.request( method, path, headers=headers )
+                    response = conn.getresponse()
+                result = f_body( response ) if response.status == 200 else response.read()
+            except BaseException: # Include KeyboardInterrupt
+                self._closeConnection( parts.scheme, parts.netloc ) # Connection can not be reused
+                raise
+            if response.will_close:
+                self._closeConnection( parts.scheme, parts.netloc )
+            if response.status in self.STATUS_REDIRECT:
+                url = urllib.parse.urljoin( url, response.getheader('Location') )
+                continue
+            return { 'status': response.status, 'reason': response.reason, 'result': result }
+        return { 'status': response.status, 'reason': 'Too many redirects', 'result': None }
+
+    def _retry(self, method, url, f_body):
+        """
+        Return: { 'isOk', 'message', 'status', 'result', 'retries' }
+        """
+        retry, message, status = 0, None, None
+        while True:
+            try:
+                r = self._request( method, url, f_body )
+                status = r['status']
+                if status == 200:
+                    return { 'isOk': True, 'status': status, 'result': r['result'], 'retries': retry }
+                message = f"HTTP {status} {r['reason']}"
+                if status < 500: # Client errors(404, 401, ...) are not retried
+                    break
+            except ( OSError, socket.timeout, http.client.HTTPException ) as e:
+                message = f"{type( e ).__name__}: {e}"
+            if retry >= self.retries:
+                break
+            time.sleep( self.backoff * 2 ** retry )
+            retry += 1
+        return { 'isOk': False, 'message': f"Url '{url}': {message}", 'status': status, 'retries': retry }
+
+    def status(self, url):
+        """
+        Check the access of url(HEAD)
+        Return: { 'isOk', 'message', 'status', 'retries' }
+        """
+        return self._retry( 'HEAD', url, lambda response: response.read() )
+
+    def get(self, url):
+        """
+        Return: { 'isOk', 'message', 'status', 'result'(bytes), 'retries' }
+        """
+        return self._retry( 'GET', url, lambda response: response.read() )
+
+    def download(self, url, filepath):
+        """
+        Streamed GET to filepath, the file only exists after complete download
+        Return: { 'isOk', 'message', 'status', 'result'(total of bytes), 'retries' }
+        """
+        def write(response):
+            total = 0
+            with open( filepath_part, 'wb' ) as f:
+                while True:
+                    chunk = response.read( self.CHUNK_SIZE )
+                    if not chunk:
+                        break
+                    f.write( chunk )
+                    total += len( chunk )
+            length = response.getheader('Content-Length')
+            if not length is None and not int( length ) == total:
+                raise http.client.IncompleteRead( b'', int( length ) - total )
+            os.replace( filepath_part, filepath )
+            return total
+
+        filepath_part = f"{filepath}.part.{os.getpid()}.{threading.get_ident()}"
+        try:
+            return self._retry( 'GET', url, write )
+        finally:
+            if os.path.exists( filepath_part ):
+                os.remove( filepath_part )
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+Name                 : Job metrics
+Description          : Metrics of long jobs(safe for threads)
+                       - Log of events: JSON lines(one object by line, with time and event)
+                       - Counters and gauges: Prometheus textfile(node exporter, textfile collector),
+                         written in temporary file and renamed(never read partial)
+Date                 : October, 2026
+copyright            : (C) 2026 by Luiz Motta
+email                : motta.luiz@gmail.com
+
+Example:
+    from mod_py.jobmetrics import JobMetrics
+    metrics = JobMetrics( 'job.jsonl', '/var/lib/node_exporter/job.prom', { 'job': 'name' } )
+    metrics.log( 'tile', image=name, seconds=1.2 )
+    metrics.add( 'stage_seconds_total', 1.2, stage='fetch' )
+    metrics.set( 'days_done', 10 )
+    metrics.writeProm()
+    metrics.close()
+
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+__author__ = 'Luiz Motta'
+__date__ = '2026-10-18'
+__copyright__ = '(C) 2026, Luiz Motta'
+__revision__ = '$Format:%H$'
+
+
+import os, json, time, threading
+
+
+class JobMetrics():
+    def __init__(self, filepath_log=None, filepath_prom=None, labels=None, prefix='gpm_daily'):
+        """
+        Args:
+            filepath_log: JSON lines(None for without log)
+            filepath_prom: Prometheus textfile(None for without textfile)
+            labels: labels of all metrics, ex.: { 'job': name }
+            prefix: prefix of names of metrics
+        """
+        self.filepath_prom, self.prefix = filepath_prom, prefix
+        self.labels = {} if labels is None else labels
+        self.lock = threading.Lock()
+        self.metrics = {} # ( name, labels ): value
+        self.types = {} # name: 'counter' or 'gauge'
+        self.file_log = None if filepath_log is None else open( filepath_log, mode='a' )
+
+    def log(self, event, **fields):
+        if self.file_log is None:
+            return
+        line = json.dumps( { 'time': round( time.time(), 3 ), 'event': event, **fields } )
+        with self.lock:
+            self.file_log.write( f"{line}\n" )
+
+    def _update(self, type, name, value, labels, isAdd):
+        key = ( name, tuple( sorted( labels.items() ) ) )
+        with self.lock:
+            self.types[ name ] = type
+            self.metrics[ key ] = self.metrics.get( key, 0 ) + value if isAdd else value
+
+    def add(self, name, value=1, **labels):
+        """
+        Counter(name with suffix '_total')
+        """
+        self._update( 'counter', name, value, labels, True )
+
+    def set(self, name, value, **labels):
+        """
+        Gauge
+        """
+        self._update( 'gauge', name, value, labels, False )
+
+    def get(self, name, **labels):
+        key = ( name, tuple( sorted( labels.items() ) ) )
+        return self.metrics.get( key, 0 )
+
+    def _formatLabels(self, labels):
+        items = { **self.labels, **dict( labels ) }.items()
+        if not items:
+            return ''
+        values = ( '{}="{}"'.format( k, str( v ).replace( '\\', '\\\\' ).replace( '"', '\\"' ) ) for k, v in items )
+        return f"{{{','.join( values )}}}"
+
+    def writeProm(self):
+        """
+        Write all metrics in textfile(and flush the log)
+        """
+        with self.lock:
+            if not self.file_log is None:
+                self.file_log.flush()
+            if self.filepath_prom is None:
+                return
+            lines = []
+            for name in sorted( self.types ):
+                lines.append( f"# TYPE {self.prefix}_{name} {self.types[ name ]}" )
+                for ( n, labels ), value in sorted( self.metrics.items() ):
+                    if n == name:
+                        lines.append( f"{self.prefix}_{name}{self._formatLabels( labels )} {value}" )
+            filepathTemp = f"{self.filepath_prom}.{os.getpid()}.tmp"
+            with open( filepathTemp, mode='w' ) as f:
+                f.write( '\n'.join( lines ) + '\n' )
+            os.replace( filepathTemp, self.filepath_prom )
+
+    def close(self):
+        self.writeProm()
+        if not self.file_log is None:
+            self.file_log.close()
+            self.file_log = None
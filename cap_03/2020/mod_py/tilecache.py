@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+Name                 : Tile cache
+Description          : Directory of tiles(files) with limit of bytes and
+                       LRU(last recently used) eviction.
+                       - Access time: modification time of file(updated by get)
+                       - Files are added complete(rename), partial files are
+                         never seen by others runs
+                       - Eviction is locked(fcntl) for runs sharing the directory
+                       - Tiles pinned(in use by any run) are not evicted, the pin is
+                         a shared lock(fcntl) of file of tile in '.pins'
+Date                 : October, 2026
+copyright            : (C) 2026 by Luiz Motta
+email                : motta.luiz@gmail.com
+
+Example:
+    from mod_py.tilecache import TileCache
+    cache = TileCache( dir_cache, max_bytes, isValid )
+    cache.pin( name ) # In use until unpin
+    filepath = cache.get( name )
+    if filepath is None:
+        filepath = cache.filepath( name )
+        download( url, filepath ) # Write temporary file and rename
+        cache.add( name )
+    ...
+    cache.unpin( name )
+
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+__author__ = 'Luiz Motta'
+__date__ = '2026-10-18'
+__copyright__ = '(C) 2026, Luiz Motta'
+__revision__ = '$Format:%H$'
+
+
+import os, fcntl, threading
+
+
+class TileCache():
+    LOCK = '.lock'
+    DIR_PINS = '.pins'
+    def __init__(self, directory, max_bytes, isValid=None):
+        """
+        Args:
+            max_bytes: limit of total bytes of tiles
+            isValid: function(filepath) return False for corrupt file(default: size > 0)
+        """
+        self.directory, self.max_bytes = directory, max_bytes
+        self.isValid = isValid if not isValid is None else lambda filepath: os.path.getsize( filepath ) > 0
+        os.makedirs( directory, exist_ok=True )
+        self.filepath_lock = os.path.join( directory, self.LOCK )
+        self.dir_pins = os.path.join( directory, self.DIR_PINS )
+        os.makedirs( self.dir_pins, exist_ok=True )
+        self.pins = {} # name: [ file descriptor of pin(shared lock), count of users ]
+        self.lockPins = threading.Lock()
+
+    def filepath(self, name):
+        return os.path.join( self.directory, name )
+
+    def filepathPin(self, name):
+        return os.path.join( self.dir_pins, name )
+
+    def get(self, name):
+        """
+        Return: filepath of valid tile or None(missing or corrupt, removed)
+        """
+        filepath = self.filepath( name )
+        try:
+            if self.isValid( filepath ):
+                os.utime( filepath ) # LRU
+                return filepath
+        except ( OSError, RuntimeError ): # Missing(or evicted) or invalid
+            pass
+        self.remove( name )
+        return None
+
+    def pin(self, name):
+        """
+        Tile in use(queued or open) is not evicted, by this or others runs, until unpin
+        """
+        with self.lockPins:
+            item = self.pins.get( name )
+            if item is None:
+                item = self.pins[ name ] = [ self._lockPin( name ), 0 ]
+            item[1] += 1
+
+    def unpin(self, name):
+        with self.lockPins:
+            item = self.pins.get( name )
+            if item is None:
+                return
+            item[1] -= 1
+            if item[1] == 0:
+                os.close( item[0] ) # Release the shared lock
+                del self.pins[ name ]
+
+    def _lockPin(self, name):
+        """
+        Return: file descriptor with shared lock of pin
+        """
+        filepath = self.filepathPin( name )
+        while True:
+            fd = os.open( filepath, os.O_RDWR | os.O_CREAT )
+            fcntl.flock( fd, fcntl.LOCK_SH ) # Wait eviction of tile
+            try:
+                if os.fstat( fd ).st_ino == os.stat( filepath ).st_ino:
+                    return fd
+            except FileNotFoundError: # Pin removed by eviction
+                pass
+            os.close( fd )
+
+    def _removeUnpinned(self, name):
+        """
+        Return: True if removed(tile without pin of any run)
+        """
+        filepath = self.filepathPin( name )
+        fd = os.open( filepath, os.O_RDWR | os.O_CREAT )
+        try:
+            try:
+                fcntl.flock( fd, fcntl.LOCK_EX | fcntl.LOCK_NB )
+            except BlockingIOError: # Pinned
+                return False
+            self.remove( name )
+            os.remove( filepath )
+        finally:
+            os.close( fd )
+        return True
+
+    def remove(self, name):
+        try:
+            os.remove( self.filepath( name ) )
+        except FileNotFoundError:
+            pass
+
+    def add(self, name):
+        """
+        Register a new tile(already in filepath) and evict the last recently used tiles
+        (except the new tile and the pinned tiles)
+        """
+        with open( self.filepath_lock, 'w' ) as f:
+            fcntl.flock( f, fcntl.LOCK_EX )
+            try:
+                self._evict( name )
+            finally:
+                fcntl.flock( f, fcntl.LOCK_UN )
+
+    def _evict(self, keep):
+        tiles, total = [], 0
+        with os.scandir( self.directory ) as it:
+            for entry in it:
+                if entry.name == self.LOCK or '.part.' in entry.name or not entry.is_file():
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError: # Removed by other run
+                    continue
+                tiles.append( ( stat.st_mtime, stat.st_size, entry.name ) )
+                total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        for _mtime, size, name in sorted( tiles ):
+            if name == keep or not self._removeUnpinned( name ):
+                continue
+            total -= size
+            if total <= self.max_bytes:
+                break
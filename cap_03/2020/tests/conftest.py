@@ -0,0 +1,4 @@
+import os, sys
+
+# Scripts of cap_03/2020(and mod_py) importable by tests
+sys.path.insert( 0, os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ) )
@@ -0,0 +1,161 @@
+import json
+
+import numpy as np
+import pytest
+
+pytest.importorskip('osgeo')
+from daily_precipitation_gpm_http import GpmDataset, StationsPixels, ZonesPixels, addTotals, checkArchiveBbox
+
+
+TRANSFORM = ( -50.0, 0.1, 0.0, -10.0, 0.0, -0.1 )
+
+class Band():
+    def __init__(self, arry):
+        self.arry = arry
+
+    def ReadAsArray(self, xoff=0, yoff=0, cols=None, rows=None):
+        cols = self.arry.shape[1] if cols is None else cols
+        rows = self.arry.shape[0] if rows is None else rows
+        return self.arry[ yoff:yoff + rows, xoff:xoff + cols ]
+
+class Dataset():
+    """
+    Image(int16) of GIS tiles in grid of TRANSFORM
+    """
+    def __init__(self, arry):
+        self.arry = arry
+        self.RasterYSize, self.RasterXSize = arry.shape
+
+    def GetGeoTransform(self):
+        return TRANSFORM
+
+    def GetProjection(self):
+        from osgeo import osr
+        sr = osr.SpatialReference()
+        sr.ImportFromEPSG( 4326 )
+        return sr.ExportToWkt()
+
+    def GetRasterBand(self, n_band):
+        return Band( self.arry )
+
+
+def tileInt16(value):
+    return np.full( ( 20, 20 ), value, dtype=np.int16 )
+
+def test_stations_sum_int16_near_limit():
+    stations = StationsPixels( [ -49.95, -48.55 ], [ -10.05, -11.55 ], [ 'A', 'B' ] )
+    scale, images = 2, 48 # 1day(scale 2) and images of 30min
+    totals = None
+    for value in ( 29999, 32767 ) * ( images // 2 ):
+        values = stations( Dataset( tileInt16( value ) ) )
+        assert values.dtype == np.float64
+        totals = values * scale if totals is None else totals + values * scale
+    expected = ( 29999 + 32767 ) * scale * images // 2
+    np.testing.assert_array_equal( totals, [ expected, expected ] )
+
+def test_zones_sum_int16_near_limit(tmp_path):
+    polygon = [ [ [ -49.9, -10.1 ], [ -49.5, -10.1 ], [ -49.5, -10.5 ], [ -49.9, -10.5 ], [ -49.9, -10.1 ] ] ]
+    geojson = {
+        'type': 'FeatureCollection',
+        'features': [ { 'type': 'Feature', 'properties': { 'id': 'Z1' }, 'geometry': { 'type': 'Polygon', 'coordinates': polygon } } ]
+    }
+    filepath = tmp_path / 'zones.geojson'
+    filepath.write_text( json.dumps( geojson ) )
+    zones = ZonesPixels( str( filepath ), 'id', supersample=2 )
+    scale, images = 2, 48
+    totals = None
+    for _ in range( images ):
+        values = zones( Dataset( tileInt16( 32767 ) ) )
+        assert values.dtype == np.float64
+        totals = values * scale if totals is None else totals + values * scale
+    mean, vmax = zones.reduce( totals )[0]
+    assert mean == pytest.approx( 32767 * scale * images )
+    assert vmax == 32767 * scale * images
+
+def test_add_totals_sets_int16():
+    scale, images = 2, 48
+    totals = None
+    for _ in range( images ):
+        values = [ np.array( [ 32767, 29999 ], dtype=np.int16 ), np.array( [ 30000 ], dtype=np.int16 ) ]
+        totals = addTotals( totals, values, scale )
+    assert all( t.dtype == np.float64 for t in totals )
+    np.testing.assert_array_equal( totals[0], [ 32767 * scale * images, 29999 * scale * images ] )
+    np.testing.assert_array_equal( totals[1], [ 30000 * scale * images ] )
+
+def test_zones_layer_other_srs(tmp_path):
+    from osgeo import ogr, osr
+    srsLatLong, srsUtm = osr.SpatialReference(), osr.SpatialReference()
+    srsLatLong.ImportFromEPSG( 4326 )
+    srsUtm.ImportFromEPSG( 32722 ) # UTM 22S
+    for srs in ( srsLatLong, srsUtm ):
+        srs.SetAxisMappingStrategy( osr.OAMS_TRADITIONAL_GIS_ORDER )
+    geom = ogr.CreateGeometryFromWkt('POLYGON((-49.9 -10.1,-49.5 -10.1,-49.5 -10.5,-49.9 -10.5,-49.9 -10.1))')
+    geom.Transform( osr.CoordinateTransformation( srsLatLong, srsUtm ) )
+    filepath = str( tmp_path / 'zones_utm.gpkg' )
+    src = ogr.GetDriverByName('GPKG').CreateDataSource( filepath )
+    layer = src.CreateLayer( 'zones', srsUtm, ogr.wkbPolygon )
+    feat = ogr.Feature( layer.GetLayerDefn() )
+    feat.SetGeometry( geom )
+    layer.CreateFeature( feat )
+    src = None
+    zones = ZonesPixels( filepath, supersample=2 )
+    totals = zones( Dataset( tileInt16( 100 ) ) )
+    assert totals.size > 0
+    mean, vmax = zones.reduce( totals )[0]
+    assert mean == pytest.approx( 100 ) and vmax == 100
+
+def test_stations_outside_archive_bbox(tmp_path):
+    filepath = tmp_path / 'stations.csv'
+    filepath.write_text( 'id;lat;long\nA;-15.8;-47.9\nB;-10.0;-50.0\n' )
+    options = { 'dir_archive': str( tmp_path ), 'archive_bbox': ( -74.0, -34.0, -34.0, 6.0 ), 'zones': False }
+    assert checkArchiveBbox( [ str( filepath ) ], options )['isOk']
+    options['archive_bbox'] = ( -49.0, -34.0, -34.0, 6.0 )
+    r = checkArchiveBbox( [ str( filepath ) ], options )
+    assert not r['isOk'] and 'archive_bbox' in r['message']
+    options['dir_archive'] = None
+    assert checkArchiveBbox( [ str( filepath ) ], options )['isOk']
+
+def test_check_range_ini_hour():
+    assert GpmDataset.checkRange( '30min', 12 )['isOk']
+    assert GpmDataset.checkRange( '3hr', 12 )['isOk']
+    assert GpmDataset.checkRange( '1day', 24 )['isOk']
+    r = GpmDataset.checkRange( '1day', 12 )
+    assert not r['isOk'] and "'3hr'" not in r['message'] and '3hr' in r['message']
+    assert not GpmDataset.checkRange( '3hr', 10 )['isOk']
+    assert GpmDataset.getRange( 12 ) == '3hr' and GpmDataset.getRange( 24 ) == '1day' and GpmDataset.getRange( 10 ) == '30min'
+
+def test_save_matrix_sqlite_zones(tmp_path):
+    import sqlite3
+    from datetime import datetime
+    from daily_precipitation_gpm_http import saveMatrix
+    from mod_py.dailymatrix import DailyMatrix
+    dailyMatrix = DailyMatrix( [ 'Z1', 'Z2' ], datetime( 2020, 1, 1 ), datetime( 2020, 1, 1 ) )
+    dailyMatrix.set( '2020-01-01', [ 1.5, 2.5 ] )
+    filepath = str( tmp_path / 'project.db' )
+    options = { 'matrix': [], 'sqlite': filepath, 'zones': True }
+    saveMatrix( dailyMatrix, str( tmp_path / 'zones' ), options, lambda message: None )
+    conn = sqlite3.connect( filepath )
+    tables = { row[0] for row in conn.execute( "SELECT name FROM sqlite_master WHERE type = 'table'" ) }
+    rows = conn.execute( 'SELECT zone, date, mean_mm FROM zones_cerrado_gpm ORDER BY zone' ).fetchall()
+    conn.close()
+    assert tables == { 'zones_cerrado_gpm' }
+    assert rows == [ ( 'Z1', '2020-01-01', 1.5 ), ( 'Z2', '2020-01-01', 2.5 ) ]
+
+def test_split_merge_shards(tmp_path, monkeypatch):
+    from datetime import datetime
+    from daily_precipitation_gpm_http import getShards, splitShards, mergeShards
+    monkeypatch.chdir( tmp_path )
+    ini_date, end_date = datetime( 2020, 1, 1 ), datetime( 2020, 1, 5 )
+    shards = getShards( ini_date, end_date, 2 )
+    name = 'st_daily_precip_2020-01-01_2020-01-05'
+    output = 'id;date;total_mm\nA;2020-01-01;1.0\nA;2020-01-02;2.0\nA;2020-01-04;4.0\n'
+    checkpoint = 'date;status;errors\n2020-01-01;ok;0\n2020-01-02;error;1\n2020-01-04;ok;0\n'
+    ( tmp_path / f"{name}.csv" ).write_text( output )
+    ( tmp_path / f"{name}_checkpoint.csv" ).write_text( checkpoint )
+    splitShards( [ 'st.csv' ], ini_date, end_date, shards )
+    assert not ( tmp_path / f"{name}.csv" ).exists()
+    shard = tmp_path / 'st_daily_precip_2020-01-04_2020-01-05.csv'
+    assert shard.read_text().split() == [ 'id;date;total_mm', 'A;2020-01-04;4.0' ]
+    mergeShards( [ 'st.csv' ], ini_date, end_date, shards )
+    assert ( tmp_path / f"{name}.csv" ).read_text().split() == output.split()
+    assert ( tmp_path / f"{name}_checkpoint.csv" ).read_text().split() == checkpoint.split()
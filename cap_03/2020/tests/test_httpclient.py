@@ -0,0 +1,100 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from mod_py.httpclient import HttpClient
+
+
+class Server():
+    """
+    Local server, keep the requests( path, authorization )
+    """
+    def __init__(self, routes, closeIdle=False):
+        """
+        Args:
+            routes: { path: ( status, headers, body ) }
+            closeIdle: Close the keep-alive connection after response(as idle timeout of server)
+        """
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                server.requests.append( ( self.path, self.headers.get('Authorization') ) )
+                status, headers, body = routes.get( self.path, ( 404, {}, b'' ) )
+                self.send_response( status )
+                for k, v in headers.items():
+                    self.send_header( k, v )
+                self.send_header( 'Content-Length', str( len( body ) ) )
+                self.end_headers()
+                self.wfile.write( body )
+                self.close_connection = closeIdle
+
+        self.httpd = ThreadingHTTPServer( ( '127.0.0.1', 0 ), Handler )
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread( target=self.httpd.serve_forever, daemon=True )
+        self.thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def servers():
+    other = Server( { '/file': ( 200, {}, b'other' ) } )
+    origin = Server( {
+        '/file': ( 200, {}, b'data' ),
+        '/same': ( 302, { 'Location': '/file' }, b'' ),
+        '/other': ( 302, { 'Location': f"{other.url}/file" }, b'' ),
+        '/unavailable': ( 503, {}, b'' )
+    } )
+    yield origin, other
+    origin.stop()
+    other.stop()
+
+def test_redirect_same_host_with_authorization(servers):
+    origin, _other = servers
+    client = HttpClient( 'user', 'password', timeout=5, retries=0 )
+    r = client.get( f"{origin.url}/same" )
+    assert r['isOk'] and r['result'] == b'data'
+    assert [ a is None for _p, a in origin.requests ] == [ False, False ]
+
+def test_redirect_other_host_without_authorization(servers):
+    origin, other = servers
+    client = HttpClient( 'user', 'password', timeout=5, retries=0 )
+    r = client.get( f"{origin.url}/other" )
+    assert r['isOk'] and r['result'] == b'other'
+    assert not origin.requests[0][1] is None
+    assert other.requests == [ ( '/file', None ) ]
+
+def test_not_retry_client_error(servers):
+    origin, _other = servers
+    client = HttpClient( timeout=5, retries=3, backoff=0.01 )
+    r = client.get( f"{origin.url}/missing" )
+    assert not r['isOk'] and r['status'] == 404 and r['retries'] == 0
+    assert len( origin.requests ) == 1
+
+def test_retry_server_error(servers):
+    origin, _other = servers
+    client = HttpClient( timeout=5, retries=2, backoff=0.01 )
+    r = client.get( f"{origin.url}/unavailable" )
+    assert not r['isOk'] and r['status'] == 503 and r['retries'] == 2
+    assert len( origin.requests ) == 3
+
+def test_reconnect_closed_keep_alive():
+    server = Server( { '/file': ( 200, {}, b'data' ) }, closeIdle=True )
+    try:
+        client = HttpClient( timeout=5, retries=0, backoff=10 )
+        for _i in range( 3 ):
+            r = client.get( f"{server.url}/file" )
+            assert r['isOk'] and r['result'] == b'data' and r['retries'] == 0
+        assert len( server.requests ) == 3
+    finally:
+        server.stop()
@@ -0,0 +1,67 @@
+import os
+
+from mod_py.tilecache import TileCache
+
+
+def addTile(cache, name, size=10):
+    with open( cache.filepath( name ), 'wb' ) as f:
+        f.write( b'0' * size )
+    cache.add( name )
+
+def setAccess(cache, names):
+    for mtime, name in enumerate( names, 1 ):
+        os.utime( cache.filepath( name ), ( mtime, mtime ) )
+
+def test_evict_last_recently_used(tmp_path):
+    cache = TileCache( str( tmp_path ), 25 )
+    addTile( cache, 'a' )
+    addTile( cache, 'b' )
+    setAccess( cache, [ 'a', 'b' ] )
+    addTile( cache, 'c' )
+    assert cache.get( 'a' ) is None
+    assert not cache.get( 'b' ) is None and not cache.get( 'c' ) is None
+
+def test_pinned_tiles_not_evicted(tmp_path):
+    cache = TileCache( str( tmp_path ), 25 )
+    for name in ( 'a', 'b' ):
+        cache.pin( name ) # Queued
+        addTile( cache, name )
+    setAccess( cache, [ 'a', 'b' ] )
+    cache.pin( 'c' )
+    addTile( cache, 'c' ) # Over limit, all pinned
+    assert all( os.path.exists( cache.filepath( n ) ) for n in ( 'a', 'b', 'c' ) )
+    cache.unpin( 'a' )
+    addTile( cache, 'd' )
+    assert not os.path.exists( cache.filepath( 'a' ) )
+    assert all( os.path.exists( cache.filepath( n ) ) for n in ( 'b', 'c', 'd' ) )
+
+def test_pin_count(tmp_path):
+    cache = TileCache( str( tmp_path ), 15 )
+    cache.pin( 'a' )
+    cache.pin( 'a' ) # Two days with same image
+    addTile( cache, 'a' )
+    setAccess( cache, [ 'a' ] )
+    cache.unpin( 'a' )
+    addTile( cache, 'b' )
+    assert os.path.exists( cache.filepath( 'a' ) )
+    cache.unpin( 'a' )
+    addTile( cache, 'c' )
+    assert not os.path.exists( cache.filepath( 'a' ) )
+
+def test_pinned_by_other_run(tmp_path):
+    cacheRun1 = TileCache( str( tmp_path ), 25 )
+    cacheRun2 = TileCache( str( tmp_path ), 25 ) # Other run(or shard) with same directory
+    cacheRun1.pin( 'a' )
+    addTile( cacheRun1, 'a' )
+    addTile( cacheRun2, 'b' )
+    setAccess( cacheRun1, [ 'a', 'b' ] )
+    addTile( cacheRun2, 'c' )
+    assert os.path.exists( cacheRun1.filepath( 'a' ) )
+    assert not os.path.exists( cacheRun2.filepath( 'b' ) )
+    cacheRun1.unpin( 'a' )
+    addTile( cacheRun2, 'd' )
+    assert not os.path.exists( cacheRun1.filepath( 'a' ) )
+    assert not os.path.exists( cacheRun1.filepathPin( 'a' ) )
+    cacheRun1.pin( 'a' ) # Pin after eviction(new file of pin)
+    assert os.path.exists( cacheRun1.filepathPin( 'a' ) )
+    cacheRun1.unpin( 'a' )
@@ -22,19 +22,24 @@ __revision__ = '$Format:%H$'
 
 
 import sys, os, glob, argparse
+from multiprocessing import Pool
 import pymannkendall as mk
 import numpy as np
+from scipy.stats import norm
 
-from osgeo import gdal, gdal_array
+from osgeo import gdal
 from gdalconst import GA_ReadOnly, GA_Update
 
-def createOutDSMem(filename, c_band, type, descriptions):
+BLOCK_SIZE = 256 # Block of output GeoTiff
+TIFF_OPTIONS = [ 'TILED=YES', f"BLOCKXSIZE={BLOCK_SIZE}", f"BLOCKYSIZE={BLOCK_SIZE}", 'COMPRESS=LZW', 'BIGTIFF=IF_SAFER' ]
+
+def createOutDS(filename, c_band, type, descriptions, filename_out='', format='MEM', options=[]):
     ds_origin = gdal.Open( filename, GA_ReadOnly )
     xsize, ysize = ds_origin.RasterXSize, ds_origin.RasterYSize
     transform = ds_origin.GetGeoTransform()
     #
-    drv = gdal.GetDriverByName('MEM')
-    ds = drv.Create('', xsize, ysize, c_band, type )
+    drv = gdal.GetDriverByName( format )
+    ds = drv.Create( filename_out, xsize, ysize, c_band, type, options=options )
     ds.SetGeoTransform( transform )
     ds.SetProjection( ds_origin.GetProjection() )
     ds.SetSpatialRef( ds_origin.GetSpatialRef() )
@@ -44,31 +49,101 @@ def createOutDSMem(filename, c_band, type, descriptions):
         b.SetDescription( descriptions[idx] )
     return ds
 
-def readArray(filename, n_band):
-    ds = gdal.Open( filename, GA_ReadOnly )
-    band = ds.GetRasterBand( n_band )
-    dtype = gdal_array.GDALTypeCodeToNumericTypeCode(gdal.GDT_Float32)
-    arry = band.ReadAsArray().astype( dtype )
-    #
-    nodata = band.GetNoDataValue()
-    ds = None
-    return arry, nodata
-
-def createTifByDataset(filename, ds):
-    drv = gdal.GetDriverByName('GTiff')
-    ds_out = drv.CreateCopy( filename, ds )
-    ds_out = None
-
-def populateDS(ds, arry):
+class StackReader():
+    """
+    Read windows of the images(same band) as stack float32 (images, rows, cols)
+    with NaN for nodata. The stack is a view of a reused buffer(valid until next read)
+    """
+    def __init__(self, filenames, n_band=1):
+        self.datasets = [ gdal.Open( f, GA_ReadOnly ) for f in filenames ]
+        self.bands = [ ds.GetRasterBand( n_band ) for ds in self.datasets ]
+        self.nodatas = [ b.GetNoDataValue() for b in self.bands ]
+        self.xsize, self.ysize = self.datasets[0].RasterXSize, self.datasets[0].RasterYSize
+        self.buffer = np.empty( 0, dtype=np.float32 )
+
+    def read(self, xoff, yoff, cols, rows):
+        total = len( self.bands ) * rows * cols
+        if self.buffer.size < total:
+            self.buffer = np.empty( total, dtype=np.float32 )
+        arry = self.buffer[ :total ].reshape( len( self.bands ), rows, cols )
+        for idx, band in enumerate( self.bands ):
+            band.ReadAsArray( xoff, yoff, cols, rows, buf_obj=arry[ idx ] )
+            if not self.nodatas[ idx ] is None:
+                arry[ idx ][ arry[ idx ] == self.nodatas[ idx ] ] = np.nan
+        return arry
+
+    def __call__(self, tile_size):
+        """
+        Return: Generator of ( xoff, yoff, cols, rows, arry )
+        """
+        for xoff, yoff, cols, rows in getTiles( self.xsize, self.ysize, tile_size ):
+            yield xoff, yoff, cols, rows, self.read( xoff, yoff, cols, rows )
+
+    def close(self):
+        self.bands.clear()
+        self.datasets.clear()
+
+def populateDS(ds, arry, xoff=0, yoff=0):
     total_images, _y, _x = arry.shape
     if not ds.RasterCount == total_images:
         return
     for idx in range(ds.RasterCount):
         band = ds.GetRasterBand( idx+1)
-        band.WriteArray( arry[idx] )
+        band.WriteArray( arry[idx], xoff, yoff )
     ds.FlushCache()
 
-def getValuesMK(arry, p_sig):
+def mannKendallTest(arry):
+    """
+    Mann-Kendall original test and Sen's slope for all columns of array
+    (same formulas of pymannkendall.original_test)
+    Args:
+        arry: array (years, pixels) without NaN
+    Return: { 's', 'var_s', 'z', 'p', 'slope' } arrays with size of pixels
+    """
+    x = arry.astype( np.float64 )
+    n, pixels = x.shape
+    s = np.zeros( pixels )
+    count_equal = np.ones( x.shape ) # Total of values equal of each value (ties)
+    slopes = np.empty( ( n * ( n - 1 ) // 2, pixels ) )
+    idx = 0
+    for k in range( n - 1 ):
+        diff = x[ k+1: ] - x[ k ]
+        s += np.sign( diff ).sum( axis=0 )
+        isEqual = ( diff == 0.0 )
+        count_equal[ k ] += isEqual.sum( axis=0 )
+        count_equal[ k+1: ] += isEqual
+        total = n - k - 1
+        slopes[ idx:idx+total ] = diff / np.arange( 1, total + 1 )[:, None]
+        idx += total
+    # Ties: sum( tp*(tp-1)*(2tp+5) ) = sum of each value ( (c-1)*(2c+5) ), c = count_equal
+    ties = ( ( count_equal - 1 ) * ( 2 * count_equal + 5 ) ).sum( axis=0 )
+    var_s = ( n * ( n - 1 ) * ( 2 * n + 5 ) - ties ) / 18
+    s_ajust = s - np.sign( s )
+    z = np.divide( s_ajust, np.sqrt( var_s ), out=np.zeros( pixels ), where=var_s > 0 )
+    p = 2 * ( 1 - norm.cdf( np.abs( z ) ) )
+    slope = np.median( slopes, axis=0 )
+    return { 's': s, 'var_s': var_s, 'z': z, 'p': p, 'slope': slope }
+
+def getValuesMK(arry, p_sig, chunk_pixels=65536):
+    """
+    Args:
+        arry: array (years, lines, cols)
+        chunk_pixels: total of pixels by mannKendallTest (limit memory of Sen's slopes)
+    """
+    z_, lines, cols = arry.shape
+    values = arry.reshape( z_, lines * cols )
+    arryMk = np.full( ( 3, lines * cols ), np.nan, dtype=np.float32 )
+    idxs = np.flatnonzero( ~np.isnan( values ).any( axis=0 ) )
+    for i in range( 0, idxs.size, chunk_pixels ):
+        idx = idxs[ i:i+chunk_pixels ]
+        r = mannKendallTest( values[:, idx ] )
+        isSig = r['p'] <= p_sig
+        arryMk[ 0, idx ] = np.where( isSig, r['s'], np.nan )
+        arryMk[ 1, idx ] = r['p']
+        arryMk[ 2, idx ] = np.where( isSig, r['slope'], np.nan )
+    return arryMk.reshape( 3, lines, cols )
+
+def getValuesMKPixels(arry, p_sig):
     z_, lines, cols = arry.shape
     arryMk = np.ndarray( ( 3, lines, cols ) )
     for l in range(lines):
@@ -85,49 +160,85 @@ def getValuesMK(arry, p_sig):
             arryMk[2, l, c] = r.slope if r.p <= p_sig else np.nan
     return arryMk
 
-def processMK(images_dir, prefix_img, p_sig, month):
+def getTiles(xsize, ysize, tile_size):
+    """
+    Return: Generator of ( xoff, yoff, cols, rows )
+    """
+    for yoff in range( 0, ysize, tile_size ):
+        rows = min( tile_size, ysize - yoff )
+        for xoff in range( 0, xsize, tile_size ):
+            cols = min( tile_size, xsize - xoff )
+            yield xoff, yoff, cols, rows
+
+stackReaderWorker = None # StackReader of each worker process
+
+def initWorker(filenames):
+    global stackReaderWorker
+    stackReaderWorker = StackReader( filenames )
+
+def processTileMK(args):
+    """
+    Worker of processMK
+    Args:
+        args: ( p_sig, by_pixel, xoff, yoff, cols, rows )
+    """
+    p_sig, by_pixel, xoff, yoff, cols, rows = args
+    arry = stackReaderWorker.read( xoff, yoff, cols, rows )
+    f_mk = getValuesMKPixels if by_pixel else getValuesMK
+    arryMk = f_mk( arry, p_sig )
+    return xoff, yoff, arryMk
+
+def processMK(images_dir, prefix_img, p_sig, month, by_pixel=False, workers=1, tile_blocks=4):
+    """
+    The images are read by tiles(aligned with blocks of output), with workers > 1
+    the tiles are read and calculated by worker processes.
+    The results are written by main process
+    """
     suffix = 'total.accum'  # cerrado_2000_06_total.accum
     name = f"{prefix_img}_*_{month}_{suffix}.tif"
     filter = os.path.join( images_dir, name )
     filenames = sorted( glob.glob( filter ) )
     total_images = len( filenames )
     print(f". Processing month: {month} ( {total_images} images)...")
-    # Create DataSet
-    ds = createOutDSMem(filenames[0], 3, gdal.GDT_Float32, [ 's_mk', f"p_{p_sig}", 'slope'] )
-    # Create Array with N images
-    arry = np.ndarray( ( total_images, ds.RasterYSize, ds.RasterXSize ) )
-    for i, f in enumerate( filenames ):
-        band, nodata = readArray( f, 1 )
-        band[ band == nodata ] = np.nan
-        #arry[i:] = band # Copy [i:]
-        arry[i] = band
-    #
-    arryMk = getValuesMK( arry, p_sig )
-    del arry
-    populateDS(ds, arryMk)
-    #
     filename = f"{prefix_img}_{month}_{suffix}_mk.tif"
     # filename = os.path.join( images_dir, filename )
-    createTifByDataset( filename, ds )
+    descriptions = [ 's_mk', f"p_{p_sig}", 'slope']
+    ds = createOutDS( filenames[0], 3, gdal.GDT_Float32, descriptions, filename, 'GTiff', TIFF_OPTIONS )
+    tile_size = tile_blocks * BLOCK_SIZE
+    if workers > 1:
+        tiles = getTiles( ds.RasterXSize, ds.RasterYSize, tile_size )
+        tasks = ( ( p_sig, by_pixel, *t ) for t in tiles )
+        with Pool( processes=workers, initializer=initWorker, initargs=( filenames, ) ) as pool:
+            for xoff, yoff, arryMk in pool.imap_unordered( processTileMK, tasks ):
+                populateDS( ds, arryMk, xoff, yoff )
+    else:
+        f_mk = getValuesMKPixels if by_pixel else getValuesMK
+        reader = StackReader( filenames )
+        for xoff, yoff, _cols, _rows, arry in reader( tile_size ):
+            populateDS( ds, f_mk( arry, p_sig ), xoff, yoff )
+        reader.close()
     ds = None
 
 
 gdal.AllRegister()
 gdal.UseExceptions()
 
-def run(images_dir, prefix_img, p_sig):
+def run(images_dir, prefix_img, p_sig, by_pixel, workers, tile_blocks):
     months = [ f"{m:02d}" for m in range(1,13) ]
     for m in months:
-        processMK(images_dir, prefix_img, p_sig, m )
+        processMK(images_dir, prefix_img, p_sig, m, by_pixel, workers, tile_blocks )
 
 def main():
     parser = argparse.ArgumentParser(description=f"Create images with Mann kendall statistics from  GPM images." )
     parser.add_argument( 'images_dir', action='store', help='Directory with images', type=str)
     parser.add_argument( 'prefix_img', action='store', help='Preffix of images(ex.:cerrado_2000_06_total.accum)', type=str)
     parser.add_argument( '--p_sig', action='store', default=0.05, help='Significance level(default: 0.05)', type=float)
+    parser.add_argument( '-x', '--by_pixel', action="store_true", help='Use pymannkendall by pixel(slow, for check the results)')
+    parser.add_argument( '-w', '--workers', action='store', default=1, help='Number of processes by tiles(default: 1)', type=int)
+    parser.add_argument( '--tile_blocks', action='store', default=4, help=f"Size of tile in blocks of {BLOCK_SIZE} pixels(default: 4)", type=int)
 
     args = parser.parse_args()
-    return run( args.images_dir, args.prefix_img, args.p_sig )
+    return run( args.images_dir, args.prefix_img, args.p_sig, args.by_pixel, args.workers, args.tile_blocks )
 
 if __name__ == "__main__":
     sys.exit( main() )
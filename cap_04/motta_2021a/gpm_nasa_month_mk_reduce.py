@@ -63,59 +63,62 @@ def createResultDS(ds_origin, filename):
     band.SetNoDataValue( 0 )
     return ds
 
+def getResult(arrySlope, arryP005):
+    """
+    Classification by months(axis 0) of each pixel
+    Args:
+        arrySlope, arryP005: array (months, rows, cols)
+    Return: array (rows, cols)
+        0: NoData
+        1: CER
+        2: NEG
+        3: NONE
+        4: POS
+        5: ALT
+    """
+    size = arrySlope.shape[0]
+    totalNanSlope = np.isnan( arrySlope ).sum( axis=0 )
+    totalSlope = size - totalNanSlope # Without NaN
+    # Comparisons with NaN are False
+    totalNeg = ( arrySlope < 0.0 ).sum( axis=0 )
+    totalNone = ( arrySlope == 0.0 ).sum( axis=0 )
+    totalPos = ( arrySlope > 0.0 ).sum( axis=0 )
+    arryResult = np.full( totalSlope.shape, 5, dtype=np.uint8 )
+    arryResult[ totalPos == totalSlope ] = 4
+    arryResult[ totalNone == totalSlope ] = 3
+    arryResult[ totalNeg == totalSlope ] = 2
+    isNanSlope = ( totalNanSlope == size )
+    isNanP005 = np.isnan( arryP005 ).all( axis=0 )
+    arryResult[ isNanSlope ] = 1
+    arryResult[ isNanSlope & isNanP005 ] = 0
+    return arryResult
+
 def populateResult(filename, slopes_p005):
-    def process(band, yoff, cols):
-        def getResult():
-            """
-            0: NoData
-            1: CER
-            2: NEG
-            3: NONE
-            4: POS
-            5: ALT
-            """
-            size = arryColSlope.size
-            totalNanP005 = np.isnan(arryColP005).sum().item()
-            totalNanSlope = np.isnan(arryColSlope).sum().item()
-            if totalNanSlope == size:
-                return 0 if totalNanP005 == size else 1
-            arry = arryColSlope[~np.isnan( arryColSlope )] # Remove NaN
-            totalNeg = ( arry < 0.0).sum().item()
-            totalNone = ( arry == 0.0).sum().item()
-            totalPos = ( arry > 0.0).sum().item()
-            if (totalNeg + totalNanSlope ) == size:
-                return 2
-            if (totalNone + totalNanSlope ) == size:
-                return 3
-            if (totalPos + totalNanSlope ) == size:
-                return 4
-            return 5
-            
-        rows = len( slopes_p005 )
-        size = ( rows, cols )
+    def process(band, xoff, yoff, cols, rows):
+        months = len( slopes_p005 )
+        size = ( months, rows, cols )
         arrySlope = np.ndarray( size, dtype=dtype_in )
         arryP005 = np.ndarray( size, dtype=dtype_in )
-        for idx in range( rows ):
-            arrySlope[ idx ] = slopes_p005[idx]['slope'].ReadAsArray( 0, yoff, win_ysize=1 ) # xoff, yoff, win_xsize, win_ysize
-            arryP005[ idx ]  = slopes_p005[idx]['p005'].ReadAsArray( 0, yoff, win_ysize=1 ) # xoff, yoff, win_xsize, win_ysize
-        arryResult = np.ndarray( ( 1, cols ), dtype=dtype_out )
-        for idy in range( cols ):
-            arryColSlope = arrySlope[:, idy ] # Months
-            arryColP005 = arryP005[:, idy ] # Months
-            arryResult[ 0, idy ] = getResult()
-        band.WriteArray( arryResult, 0, yoff ) # xoff, yoff
-        band.FlushCache()
-        del arrySlope, arryP005, arryResult, arryColSlope, arryColP005
+        for idx in range( months ):
+            slopes_p005[idx]['slope'].ReadAsArray( xoff, yoff, cols, rows, buf_obj=arrySlope[ idx ] )
+            slopes_p005[idx]['p005'].ReadAsArray( xoff, yoff, cols, rows, buf_obj=arryP005[ idx ] )
+        arryResult = getResult( arrySlope, arryP005 )
+        band.WriteArray( arryResult, xoff, yoff )
+        del arrySlope, arryP005, arryResult
 
     dsResult = createResultDS( slopes_p005[0]['ds'], filename )
     band = dsResult.GetRasterBand(1)
     dtype_in = gdal_array.GDALTypeCodeToNumericTypeCode( gdal.GDT_Float32 )
-    dtype_out = gdal_array.GDALTypeCodeToNumericTypeCode( gdal.GDT_Byte )
     xsize = dsResult.RasterXSize
     ysize = dsResult.RasterYSize
-    for y in range( 0, ysize):
-        printProgressBar(y + 1, ysize, prefix=filename, suffix='Complete', length = 50)
-        process( band, y, xsize )
+    block_xsize, block_ysize = slopes_p005[0]['slope'].GetBlockSize()
+    for y in range( 0, ysize, block_ysize ):
+        rows = min( block_ysize, ysize - y )
+        printProgressBar(y + rows, ysize, prefix=filename, suffix='Complete', length = 50)
+        for x in range( 0, xsize, block_xsize ):
+            cols = min( block_xsize, xsize - x )
+            process( band, x, y, cols, rows )
+        band.FlushCache()
     dsResult = None
 
 def run(dir_tendences):
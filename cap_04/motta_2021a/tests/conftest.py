@@ -0,0 +1,4 @@
+import os, sys
+
+# Scripts of cap_04/motta_2021a importable by tests
+sys.path.insert( 0, os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ) )
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('osgeo')
+mk = pytest.importorskip('pymannkendall')
+from gpm_nasa_month_mk import mannKendallTest, getValuesMK, getValuesMKPixels
+
+
+P_SIG = 0.05
+
+def getTrend(z, p, alpha=P_SIG):
+    """
+    Trend label of pymannkendall(h = p <= alpha)
+    """
+    if p > alpha:
+        return 'no trend'
+    return 'increasing' if z > 0 else 'decreasing'
+
+def assertSameTest(arry):
+    """
+    Args:
+        arry: array (years, pixels), pixels with NaN are compared without the NaN(as pymannkendall),
+              except Sen's slope(pymannkendall keeps the gaps of years, pixels with NaN are NaN in getValuesMK)
+    """
+    for idx in range( arry.shape[1] ):
+        v = arry[:, idx ]
+        r = mannKendallTest( v[ ~np.isnan( v ) ][:, None ] )
+        expected = mk.original_test( v, P_SIG )
+        assert r['s'][0] == expected.s
+        assert r['var_s'][0] == pytest.approx( expected.var_s )
+        assert r['z'][0] == pytest.approx( expected.z )
+        assert r['p'][0] == pytest.approx( expected.p, abs=1e-12 )
+        if not np.isnan( v ).any():
+            assert r['slope'][0] == pytest.approx( expected.slope )
+        assert getTrend( r['z'][0], r['p'][0] ) == expected.trend
+
+def test_random():
+    rng = np.random.default_rng( 1 )
+    years = np.arange( 20 )[:, None]
+    arry = rng.normal( 100, 30, ( 20, 200 ) ) + years * rng.normal( 0, 3, 200 ) # Some pixels with trend
+    r = mannKendallTest( arry )
+    trends = { getTrend( z, p ) for z, p in zip( r['z'], r['p'] ) }
+    assert trends == { 'increasing', 'decreasing', 'no trend' }
+    assertSameTest( arry )
+
+def test_ties():
+    rng = np.random.default_rng( 2 )
+    arry = rng.integers( 0, 4, ( 15, 100 ) ).astype( np.float64 ) # Precipitation rounded, many equals
+    arry[:, 0 ] = 7.0 # All equals: var_s 0 and z 0
+    assertSameTest( arry )
+
+def test_nan():
+    rng = np.random.default_rng( 3 )
+    arry = rng.normal( 100, 30, ( 20, 50 ) ) + np.arange( 20 )[:, None]
+    arry[ rng.integers( 0, 20, 25 ), np.arange( 25 ) ] = np.nan
+    assertSameTest( arry )
+    # Pixels with NaN are NaN in output(as getValuesMKPixels)
+    stack = arry.reshape( 20, 5, 10 ).astype( np.float32 )
+    values, expected = getValuesMK( stack, P_SIG ), getValuesMKPixels( stack, P_SIG )
+    np.testing.assert_array_equal( np.isnan( values ), np.isnan( expected ) )
+    isValue = ~np.isnan( expected )
+    np.testing.assert_allclose( values[ isValue ], expected[ isValue ], rtol=1e-5 )
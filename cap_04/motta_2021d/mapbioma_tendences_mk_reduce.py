@@ -21,7 +21,7 @@ __copyright__ = '(C) 2021, Luiz Motta'
 __revision__ = '$Format:%H$'
 
 
-import sys, os, glob, struct, argparse
+import sys, os, glob, argparse
 import numpy as np
 
 from osgeo import gdal, gdal_array
@@ -33,39 +33,34 @@ gdal.SetCacheMax (1000000000)
 
 
 class ValueBand():
-    struct_types = {
-        gdal.GDT_Byte: 'B',
-        gdal.GDT_UInt16: 'H',
-        gdal.GDT_Int16: 'h',
-        gdal.GDT_UInt32: 'I',
-        gdal.GDT_Int32: 'i',
-        gdal.GDT_Float32: 'f',
-        gdal.GDT_Float64: 'd'
-    }
+    """
+    Values of band(in memory) from arrays of coordinates
+    """
     def __init__(self, ds, n_band):
         transf = ds.GetGeoTransform()
         self.x_min, self.y_max = transf[0], transf[3]
         self.x_max, self.y_min = self.x_min + ds.RasterXSize * transf[1], self.y_max + ds.RasterYSize * transf[-1]
         self.transfInv = gdal.InvGeoTransform( transf )
-        self.band = ds.GetRasterBand( n_band )
-        self.nodata = self.band.GetNoDataValue()
-        self.struct_format = self.struct_types[ self.band.DataType ]
-        if self.band.DataType in ( gdal.GDT_Float32, gdal.GDT_Float64 ):
-            self.value = lambda unpack_value: unpack_value[0]
-        else:
-            self.value = lambda unpack_value: int( unpack_value[0] )
-        self.data = { 'xsize': 1, 'ysize': 1, 'buf_type': self.band.DataType }
-        
+        band = ds.GetRasterBand( n_band )
+        self.nodata = band.GetNoDataValue()
+        self.arry = band.ReadAsArray()
+
     def isValid(self, x, y):
-        return self.x_min < x < self.x_max and self.y_min < y < self.y_max
-        
+        return ( self.x_min < x ) & ( x < self.x_max ) & ( self.y_min < y ) & ( y < self.y_max )
+
     def get(self, x, y):
-        px, py = gdal.ApplyGeoTransform( self.transfInv, x, y )
-        d = dict( { 'xoff': int( px ), 'yoff': int( py ) }, **self.data )
-        struct_value = self.band.ReadRaster( **d )
-        unpack_value = struct.unpack( self.struct_format, struct_value )
-        value = self.value( unpack_value )
-        return None if value == self.nodata else value
+        """
+        Args:
+            x, y: arrays of valid coordinates(see isValid)
+        Return: ( values, isData )
+        """
+        t = self.transfInv
+        px = ( t[0] + t[1] * x + t[2] * y ).astype( np.int64 )
+        py = ( t[3] + t[4] * x + t[5] * y ).astype( np.int64 )
+        ysize, xsize = self.arry.shape
+        values = self.arry[ np.minimum( py, ysize - 1 ), np.minimum( px, xsize - 1 ) ]
+        isData = np.ones( values.shape, dtype=bool ) if self.nodata is None else ( values != self.nodata )
+        return values, isData
 
 
 class XYCenter():
@@ -109,25 +104,19 @@ def createResultDS(ds_origin, filename, description):
 
 def populateResult(ds_map, ds_reduce, ds_result):
     def process(xoff, yoff, cols, rows):
-        def getValue(x, y, pixelMap):
-            coords = xy_map.get( x, y)
-            if not valueBand.isValid( *coords ):
-                return 0 # Out of image # Nodata
-            pixelTendence = valueBand.get( *coords )
-            if pixelTendence is None:
-                return 0 # Nodata
-            return 10 * pixelMap + pixelTendence
-
         arr = band_map.ReadAsArray( xoff, yoff, cols, rows )
-        iszero = ( arr == 0 )
-        if ( iszero == True ).sum() == ( cols * rows ):
+        y, x = np.nonzero( arr )
+        if y.size == 0:
             band_result.WriteArray( arr, xoff, yoff ) # NoData
             del arr
             return
-        y, x = np.where(iszero == False)
-        idxs = list( zip( y, x) )
-        for idx in idxs:
-            arr[ idx[0], idx[1] ] = getValue( xoff + idx[1], yoff + idx[0], arr[ idx[0], idx[1] ].item() )
+        coordX, coordY = xy_map.get( xoff + x, yoff + y )
+        isValid = valueBand.isValid( coordX, coordY ) # Out of image: Nodata
+        pixelTendence, isData = valueBand.get( coordX[ isValid ], coordY[ isValid ] )
+        pixelMap = arr[ y[ isValid ], x[ isValid ] ].astype( np.int64 )
+        values = np.zeros( y.size, dtype=np.int64 )
+        values[ isValid ] = np.where( isData, 10 * pixelMap + pixelTendence, 0 )
+        arr[ y, x ] = values
         band_result.WriteArray( arr, xoff, yoff )
         del arr
     
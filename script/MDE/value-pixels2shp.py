@@ -145,25 +145,32 @@ class LayerValuePixels():
             g.Transform( self.ct )
             return g
 
-        insideImage = lambda x, y: (
-            self.vp.boundBoxImage['minX'] <= x <= self.vp.boundBoxImage['maxX'] and \
-            self.vp.boundBoxImage['minY'] <= y <= self.vp.boundBoxImage['maxY']
-        )
         f_trans = getGeomCoordTrans if not self.ct is None \
             else lambda geom: geom
         c_points, total_points = 0, self.layer.GetFeatureCount()
+        fids, xs, ys = [], [], []
         for feat in self.layer:
             c_points += 1
-            msg = f"Processing point {c_points} of {total_points}"
+            msg = f"Reading point {c_points} of {total_points}"
             printStatus( msg )
             # Geom
             geom = feat.GetGeometryRef()
             geomT = f_trans( geom )
-            # Add value pixel
-            x, y = geomT.GetX(), geomT.GetY()
-            if not insideImage( x, y ):
+            fids.append( feat.GetFID() )
+            xs.append( geomT.GetX() )
+            ys.append( geomT.GetY() )
+            feat = None
+        # Add value pixel(outside image or nodata are skipped)
+        printStatus( f"Sampling {total_points} points..." )
+        values, isValid = self.vp.sample( xs, ys )
+        c_points = 0
+        for fid, value, valid in zip( fids, values.tolist(), isValid.tolist() ):
+            c_points += 1
+            if not valid:
                 continue
-            value = self.vp(  x, y )
+            msg = f"Processing point {c_points} of {total_points}"
+            printStatus( msg )
+            feat = self.layer.GetFeature( fid )
             feat.SetField( self.idxField, value )
             self.layer.SetFeature( feat )
             feat = None
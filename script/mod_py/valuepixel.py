@@ -27,10 +27,12 @@ __revision__ = '$Format:%H$'
 
 import struct
 
+import numpy as np
+
 try:
-    from osgeo import gdal
+    from osgeo import gdal, gdal_array
 except ImportError:
-    import gdal
+    import gdal, gdal_array
 
 class ValuePixel():
     FMTTYPES = {
@@ -40,7 +42,7 @@ class ValuePixel():
         gdal.GDT_Int32: 'i',
         gdal.GDT_UInt32: 'I',
         gdal.GDT_Float32: 'f',
-        gdal.GDT_Float64: 'f'
+        gdal.GDT_Float64: 'd'
     }
     def __init__(self, dataset):
         def getBoundBoxImage(transf):
@@ -73,3 +75,37 @@ class ValuePixel():
         struct_v = self.band.ReadRaster( **args )
         ( value, ) = struct.unpack( self.fmt , struct_v )
         return value
+
+    def sample(self, xs, ys):
+        """
+        Values of pixels for arrays of coordinates, each block of band is read once
+        Args:
+            xs, ys: arrays of coordinates
+        Return: ( values, isValid )
+                isValid is False for coordinates outside of image or value is nodata
+        """
+        xs = np.asarray( xs, dtype=np.float64 )
+        ys = np.asarray( ys, dtype=np.float64 )
+        t = self.transfInv
+        px = np.floor( t[0] + t[1] * xs + t[2] * ys ).astype( np.int64 )
+        py = np.floor( t[3] + t[4] * xs + t[5] * ys ).astype( np.int64 )
+        xsize, ysize = self.ds.RasterXSize, self.ds.RasterYSize
+        isInside = ( px >= 0 ) & ( px < xsize ) & ( py >= 0 ) & ( py < ysize )
+        dtype = gdal_array.GDALTypeCodeToNumericTypeCode( self.band.DataType )
+        values = np.zeros( xs.shape, dtype=dtype )
+        idxs = np.flatnonzero( isInside )
+        if idxs.size:
+            # Group points by block
+            b_xsize, b_ysize = self.band.GetBlockSize()
+            blocks_x = ( xsize + b_xsize - 1 ) // b_xsize
+            keys = ( py[ idxs ] // b_ysize ) * blocks_x + px[ idxs ] // b_xsize
+            order = np.argsort( keys, kind='stable' )
+            keys_block, starts = np.unique( keys[ order ], return_index=True )
+            for key, idxs_block in zip( keys_block, np.split( idxs[ order ], starts[1:] ) ):
+                xoff, yoff = ( key % blocks_x ) * b_xsize, ( key // blocks_x ) * b_ysize
+                cols, rows = min( b_xsize, xsize - xoff ), min( b_ysize, ysize - yoff )
+                arry = self.band.ReadAsArray( int( xoff ), int( yoff ), int( cols ), int( rows ) )
+                values[ idxs_block ] = arry[ py[ idxs_block ] - yoff, px[ idxs_block ] - xoff ]
+        nodata = self.band.GetNoDataValue()
+        isValid = isInside if nodata is None else ( isInside & ( values != nodata ) )
+        return values, isValid